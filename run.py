@@ -8,4 +8,6 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from table_scanner.server import main
 
-main()
+# Guarded so scanner worker processes started with "spawn" don't relaunch the server
+if __name__ == "__main__":
+    main()
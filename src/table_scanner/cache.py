@@ -0,0 +1,112 @@
+"""On-disk cache of file collection + schema parsing results.
+
+Entries are keyed on the repo's git state (HEAD, working-tree status) and the
+schema.rb mtime, so scanning the same checkout for another table skips the
+repo walk and schema parse. Repos that aren't git checkouts are never cached.
+
+The status includes gitignored files, since collect_files walks and scans
+them too (local config/*.yml, for one), but not the SKIP_DIRS the walk never
+enters. Only file additions and removals change the status key: that is all
+the cached file list depends on, as file contents are read on every scan.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .file_collector import SKIP_DIRS
+from .models import FileCategory
+
+# Bump when the cached data layout changes
+CACHE_VERSION = 3
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "table-scanner"
+
+# SKIP_DIRS at any depth, as collect_files prunes them
+_SKIP_PATHSPECS = tuple(
+    f":(exclude,glob){pattern}" for name in sorted(SKIP_DIRS) for pattern in (f"**/{name}", f"**/{name}/**")
+)
+
+CacheKey = Tuple
+Bundle = Tuple[Dict[FileCategory, List[str]], FrozenSet[str], Dict[str, Dict[str, str]]]
+
+
+def _git(repo_path: Path, *args: str) -> Optional[bytes]:
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=repo_path, capture_output=True, timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def cache_key(repo_path: Path) -> Optional[CacheKey]:
+    """Return the key for repo_path's current state, or None if it can't be cached.
+
+    repo_path must already be resolved: the cached file paths are built from it.
+    """
+    head = _git(repo_path, "rev-parse", "HEAD")
+    if head is None:
+        return None
+    # Added/removed files change the collected file set without moving HEAD.
+    # Ignored files are collected as well; SKIP_DIRS are left out on both sides.
+    status = _git(
+        repo_path, "status", "--porcelain", "--untracked-files=all", "--ignored",
+        "--", ".", *_SKIP_PATHSPECS,
+    )
+    if status is None:
+        return None
+    try:
+        schema_mtime = (repo_path / "db" / "schema.rb").stat().st_mtime_ns
+    except OSError:
+        schema_mtime = None
+    return (
+        CACHE_VERSION,
+        str(repo_path.resolve()),
+        head.strip().decode("ascii", "replace"),
+        hashlib.sha1(status).hexdigest(),
+        schema_mtime,
+    )
+
+
+def _cache_file(key: CacheKey) -> Path:
+    return CACHE_DIR / (hashlib.sha1(key[1].encode("utf-8")).hexdigest() + ".pkl")
+
+
+def load(key: CacheKey) -> Optional[Bundle]:
+    """Return (categorized, known_tables, schema_columns) cached under key, if fresh."""
+    try:
+        with open(_cache_file(key), "rb") as f:
+            stored_key, bundle = pickle.load(f)
+    except (OSError, EOFError, pickle.PickleError, AttributeError, ValueError, TypeError):
+        return None
+    if stored_key != key:
+        return None
+    categorized, known_tables, schema_columns = bundle
+    # Unpickled strings aren't interned; restore it for the table-name filters
+    known_tables = frozenset(sys.intern(t) for t in known_tables)
+    return categorized, known_tables, schema_columns
+
+
+def save(key: CacheKey, bundle: Bundle):
+    """Store bundle under key. Failures are reported and otherwise ignored."""
+    path = _cache_file(key)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            pickle.dump((key, bundle), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Warning: cannot write scan cache {path}: {e}", file=sys.stderr)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
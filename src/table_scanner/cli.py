@@ -5,6 +5,14 @@ import sys
 
 from .models import Confidence
 from .runner import run
+from .scanners.base import check_identifier
+
+
+def _table_name(value: str) -> str:
+    try:
+        return check_identifier(value, "table name")
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 def parse_args(argv=None):
@@ -20,6 +28,11 @@ def parse_args(argv=None):
     parser.add_argument(
         "--keep-clone", action="store_true", help="Don't delete temp clone"
     )
+    parser.add_argument(
+        "--full-clone",
+        action="store_true",
+        help="Clone full git history instead of a shallow single-branch clone",
+    )
     parser.add_argument(
         "--min-confidence",
         choices=["HIGH", "MEDIUM", "LOW"],
@@ -27,7 +40,12 @@ def parse_args(argv=None):
         help="Minimum confidence level to include (default: LOW)",
     )
     parser.add_argument(
-        "--table-name", default="users", help="Table name to scan for (default: users)"
+        "--table-name", type=_table_name, default="users", help="Table name to scan for (default: users)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-walk the repo and re-parse schema.rb instead of using the scan cache",
     )
     return parser.parse_args(argv)
 
@@ -41,8 +59,10 @@ def main(argv=None):
             local_path=args.local_path,
             output=args.output,
             keep_clone=args.keep_clone,
+            full_clone=args.full_clone,
             min_confidence=min_confidence,
             table_name=args.table_name,
+            use_cache=not args.no_cache,
         )
     except KeyboardInterrupt:
         print("\nInterrupted.", file=sys.stderr)
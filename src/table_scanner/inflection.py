@@ -2,8 +2,14 @@
 
 Covers the most common patterns seen in Rails snake_case table names.
 Does not aim to be a full inflector -- just enough accuracy for FK derivation.
+All helpers are pure functions of one string and are memoized.
 """
 
+import re
+from functools import lru_cache
+
+_CAMEL_BOUNDARY_RE = re.compile(r"(?<!^)(?=[A-Z])")
+
 # Irregular nouns: plural -> singular
 IRREGULAR_PLURAL_TO_SINGULAR: dict[str, str] = {
     "people": "person",
@@ -38,7 +44,44 @@ IRREGULAR_PLURAL_TO_SINGULAR: dict[str, str] = {
 # Irregular nouns: singular -> plural
 IRREGULAR_SINGULAR_TO_PLURAL: dict[str, str] = {v: k for k, v in IRREGULAR_PLURAL_TO_SINGULAR.items()}
 
+# Plural suffix -> (minimum word length, chars to strip, replacement).
+# Looked up by the word's last 4 characters first, then its last 3, so the
+# longer sibilant suffixes win over "-ses".
+_SINGULAR_SUFFIX_RULES: dict[str, tuple[int, int, str]] = {
+    # -ies -> -y  (companies -> company, categories -> category)
+    "ies": (5, 3, "y"),
+    # -ves -> -fe  (knives -> knife, wives -> wife); most -ves words come from -fe originals
+    "ves": (5, 3, "fe"),
+    # Sibilants + es: strip -es  (addresses -> address, boxes -> box,
+    # churches -> church, dishes -> dish)
+    "sses": (0, 2, ""),
+    "ches": (0, 2, ""),
+    "shes": (0, 2, ""),
+    "xes": (0, 2, ""),
+    "zes": (0, 2, ""),
+    # -ses -> -s  (buses -> bus, statuses -> status, processes -> process)
+    "ses": (5, 2, ""),
+    # -oes -> -o  (heroes -> hero, potatoes -> potato)
+    "oes": (5, 2, ""),
+}
 
+# Singular suffix -> (chars to strip, replacement), looked up longest tail first.
+_PLURAL_SUFFIX_RULES: dict[str, tuple[int, str]] = {
+    # Already ends with a common plural marker – assume already plural
+    "ies": (0, ""),
+    # -fe -> -ves  (knife -> knives, wife -> wives)
+    # (-f -> -ves is skipped: too many false positives, e.g. "belief" -> "beliefs")
+    "fe": (2, "ves"),
+    # Sibilant endings: -s, -x, -z, -ch, -sh -> -es
+    "ch": (0, "es"),
+    "sh": (0, "es"),
+    "s": (0, "es"),
+    "x": (0, "es"),
+    "z": (0, "es"),
+}
+
+
+@lru_cache(maxsize=4096)
 def singularize(word: str) -> str:
     """Convert a plural English word (typically a Rails table name) to singular.
 
@@ -59,27 +102,14 @@ def singularize(word: str) -> str:
     if lower in IRREGULAR_PLURAL_TO_SINGULAR:
         return IRREGULAR_PLURAL_TO_SINGULAR[lower]
 
-    # -ies -> -y  (companies -> company, categories -> category)
-    if lower.endswith("ies") and len(lower) > 4:
-        return lower[:-3] + "y"
-
-    # -ves -> -fe  (knives -> knife, wives -> wife)
-    if lower.endswith("ves") and len(lower) > 4:
-        # Most -ves words come from -fe originals
-        return lower[:-3] + "fe"
-
-    # Words ending in sibilants + es: -sses, -xes, -zes, -ches, -shes -> strip -es
-    # (addresses -> address, boxes -> box, churches -> church, dishes -> dish)
-    if lower.endswith(("sses", "xes", "zes", "ches", "shes")):
-        return lower[:-2]  # strip just the trailing 'es' from e.g. 'addresses' -> 'address'
-
-    # -ses -> -s  (buses -> bus, statuses -> status, processes -> process)
-    if lower.endswith("ses") and len(lower) > 4:
-        return lower[:-2]  # addresses -> addresse handled above; statuses -> status
-
-    # -oes -> -o  (heroes -> hero, potatoes -> potato)
-    if lower.endswith("oes") and len(lower) > 4:
-        return lower[:-2]
+    # Suffix rules keyed on the last 4 then 3 characters (see _SINGULAR_SUFFIX_RULES)
+    for tail in (lower[-4:], lower[-3:]):
+        rule = _SINGULAR_SUFFIX_RULES.get(tail)
+        if rule is not None:
+            min_len, strip, replacement = rule
+            if len(lower) >= min_len:
+                return lower[:len(lower) - strip] + replacement
+            break
 
     # Generic trailing -s: strip exactly one s
     if lower.endswith("s") and not lower.endswith("ss"):
@@ -88,6 +118,7 @@ def singularize(word: str) -> str:
     return lower
 
 
+@lru_cache(maxsize=4096)
 def pluralize(word: str) -> str:
     """Convert a singular English word (typically a Rails model name) to plural.
 
@@ -107,24 +138,16 @@ def pluralize(word: str) -> str:
     if lower in IRREGULAR_SINGULAR_TO_PLURAL:
         return IRREGULAR_SINGULAR_TO_PLURAL[lower]
 
-    # Already ends with a common plural marker – assume already plural
-    if lower.endswith("ies"):
-        return lower
-
-    # -fe -> -ves  (knife -> knives, wife -> wives)
-    if lower.endswith("fe"):
-        return lower[:-2] + "ves"
-
-    # -f -> -ves  (wolf -> wolves, leaf -> leaves) -- only for common patterns
-    # (too many false positives with e.g. "belief" -> "beliefs", so skipped here)
-
     # Consonant + y -> -ies  (company -> companies, category -> categories)
     if lower.endswith("y") and len(lower) > 2 and lower[-2] not in "aeiou":
         return lower[:-1] + "ies"
 
-    # Sibilant endings: -s, -x, -z, -ch, -sh -> -es
-    if lower.endswith(("s", "x", "z", "ch", "sh")):
-        return lower + "es"
+    # Suffix rules keyed on the last 3, 2 then 1 characters (see _PLURAL_SUFFIX_RULES)
+    for tail in (lower[-3:], lower[-2:], lower[-1:]):
+        rule = _PLURAL_SUFFIX_RULES.get(tail)
+        if rule is not None:
+            strip, replacement = rule
+            return lower[:len(lower) - strip] + replacement
 
     # -o -> -oes for common words (hero -> heroes)
     # Skipped – too many exceptions (radio -> radios)
@@ -132,6 +155,7 @@ def pluralize(word: str) -> str:
     return lower + "s"
 
 
+@lru_cache(maxsize=4096)
 def class_name_to_table_name(class_name: str) -> str:
     """Convert a CamelCase Rails model class name to a snake_case plural table name.
 
@@ -142,7 +166,6 @@ def class_name_to_table_name(class_name: str) -> str:
       Person          -> people
       Company         -> companies
     """
-    import re
     # CamelCase -> snake_case
-    snake = re.sub(r"(?<!^)(?=[A-Z])", "_", class_name).lower()
+    snake = _CAMEL_BOUNDARY_RE.sub("_", class_name).lower()
     return pluralize(snake)
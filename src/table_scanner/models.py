@@ -1,29 +1,17 @@
 """Data structures for scan results."""
 
-from dataclasses import dataclass
-from enum import Enum
+import sys
+from dataclasses import dataclass, field, fields
+from enum import Enum, IntEnum
+from operator import attrgetter
+from typing import List, Tuple
 
 
-class Confidence(Enum):
-    HIGH = "HIGH"
-    MEDIUM = "MEDIUM"
-    LOW = "LOW"
-
-    def __ge__(self, other):
-        order = {Confidence.LOW: 0, Confidence.MEDIUM: 1, Confidence.HIGH: 2}
-        return order[self] >= order[other]
-
-    def __gt__(self, other):
-        order = {Confidence.LOW: 0, Confidence.MEDIUM: 1, Confidence.HIGH: 2}
-        return order[self] > order[other]
-
-    def __le__(self, other):
-        order = {Confidence.LOW: 0, Confidence.MEDIUM: 1, Confidence.HIGH: 2}
-        return order[self] <= order[other]
-
-    def __lt__(self, other):
-        order = {Confidence.LOW: 0, Confidence.MEDIUM: 1, Confidence.HIGH: 2}
-        return order[self] < order[other]
+class Confidence(IntEnum):
+    # Ordered so comparisons are plain integer compares; use .name for display
+    LOW = 0
+    MEDIUM = 1
+    HIGH = 2
 
 
 class ReferenceType(Enum):
@@ -64,7 +52,7 @@ class FileCategory(Enum):
     YML = "yml"
 
 
-@dataclass
+@dataclass(slots=True)
 class ScanResult:
     file_path: str
     line_number: int
@@ -78,6 +66,36 @@ class ScanResult:
     # Column datatype from schema.rb (e.g. "integer", "bigint", "string")
     column_datatype: str = ""
 
-    @property
-    def dedup_key(self):
-        return (self.file_path, self.line_number, self.reference_type)
+    # (file_path, line_number, reference_type), computed once at construction.
+    # Dedup runs before file paths are made repo-relative, so a later rewrite of
+    # file_path intentionally does not change the key.
+    dedup_key: tuple = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Table and column names repeat across thousands of results and are hashed
+        # by every known-table / schema lookup; interning makes those compares
+        # identity checks and stores each distinct name once
+        self.table_name = sys.intern(self.table_name)
+        self.column_name = sys.intern(self.column_name)
+        self.dedup_key = (self.file_path, self.line_number, self.reference_type)
+
+
+# Constructor fields of ScanResult, in positional order
+_RESULT_FIELDS = tuple(f.name for f in fields(ScanResult) if f.init)
+_result_row = attrgetter(*_RESULT_FIELDS)
+
+ResultColumns = Tuple[tuple, ...]
+
+
+def pack_results(results: List[ScanResult]) -> ResultColumns:
+    """Convert results to one tuple per field, for sending between processes.
+
+    Pickling a few flat columns of strings, ints and (memoized) enum members
+    is much cheaper than pickling one object per result.
+    """
+    return tuple(zip(*map(_result_row, results)))
+
+
+def unpack_results(columns: ResultColumns) -> List[ScanResult]:
+    """Inverse of pack_results."""
+    return [ScanResult(*row) for row in zip(*columns)]
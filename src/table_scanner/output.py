@@ -25,14 +25,16 @@ def write_csv(results: List[ScanResult], dest: IO[str] | None = None):
     out = dest or sys.stdout
     writer = csv.writer(out)
     writer.writerow(COLUMNS)
-    for r in results:
-        writer.writerow([
+    writer.writerows(
+        (
             r.file_path,
             r.line_number,
             r.table_name,
             r.column_name,
             r.reference_type.value,
             r.code_snippet,
-            r.confidence.value,
+            r.confidence.name,
             r.schema_verified,
-        ])
+        )
+        for r in results
+    )
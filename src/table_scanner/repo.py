@@ -7,13 +7,20 @@ import tempfile
 from pathlib import Path
 
 
-def clone_repo(repo: str) -> Path:
-    """Clone a GitHub repo into a temp directory. Returns the path."""
+def clone_repo(repo: str, full_clone: bool = False) -> Path:
+    """Clone a GitHub repo into a temp directory. Returns the path.
+
+    By default only the latest commit of the default branch is fetched; the
+    scanners never read git history. full_clone=True fetches everything.
+    """
     tmp = Path(tempfile.mkdtemp(prefix="table-scan-"))
     dest = tmp / "repo"
     print(f"Cloning {repo} into {dest} ...", file=sys.stderr)
+    cmd = ["gh", "repo", "clone", repo, str(dest)]
+    if not full_clone:
+        cmd += ["--", "--depth", "1", "--single-branch"]
     result = subprocess.run(
-        ["gh", "repo", "clone", repo, str(dest), "--", "--depth", "1"],
+        cmd,
         capture_output=True,
         text=True,
     )
@@ -2,38 +2,52 @@
 
 from __future__ import annotations
 
+import os
 import re
 import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Set
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
 
-from .file_collector import collect_files
-from .models import Confidence, FileCategory, ReferenceType, ScanResult
+from . import cache
+from .file_collector import collect_files, read_file_bytes
+from .models import (
+    Confidence, FileCategory, ReferenceType, ResultColumns, ScanResult, pack_results, unpack_results,
+)
 from .output import write_csv
 from .repo import cleanup, clone_repo
 from .scanners import ALL_SCANNERS
+from .scanners.base import (
+    HSPACE, BaseScanner, FileCache, LineIndex, check_identifier, is_plain_ascii, scan_fused,
+)
 from .scanners.model_scanner import ModelScanner
 
 
-def _extract_known_tables(categorized: Dict[FileCategory, List[Path]]) -> Set[str]:
-    """Parse schema.rb to get the set of real database table names."""
-    tables: Set[str] = set()
-    create_re = re.compile(r'create_table\s+"(\w+)"')
-    for path in categorized.get(FileCategory.SCHEMA, []):
-        try:
-            for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
-                m = create_re.search(line)
-                if m:
-                    tables.add(m.group(1))
-        except OSError:
-            pass
-    return tables
-
-
-def _extract_schema_columns(categorized: Dict[FileCategory, List[Path]]) -> Dict[str, Dict[str, str]]:
-    """Parse schema.rb to build a mapping of table_name -> {column_name: datatype}.
-
-    Parses every `create_table` block and collects column names and types from lines like:
+# Plain-ASCII schema.rb (see is_plain_ascii) is matched as bytes, where \w
+# only captures ASCII. "\n" is its only line break and [ \t] is all of \s
+# there besides it, so matches stay on one line. Any other schema.rb is
+# decoded and matched as str with HSPACE, which excludes every
+# str.splitlines() break.
+_CREATE_TABLE_RE = re.compile(rb'create_table[ \t]+"(\w+)"')
+# create_table "name"  or  t.<type> "col_name" / t.<type> :col_name
+_SCHEMA_LINE_RE = re.compile(
+    rb'create_table[ \t]+"(?P<table>\w+)"'
+    rb'|\bt\.(?P<col_type>\w+)[ \t]+[":](?P<col_name>\w+)'
+)
+_CREATE_TABLE_STR_RE = re.compile(rf'create_table{HSPACE}+"(\w+)"')
+_SCHEMA_LINE_STR_RE = re.compile(
+    rf'create_table{HSPACE}+"(?P<table>\w+)"'
+    rf'|\bt\.(?P<col_type>\w+){HSPACE}+[":](?P<col_name>\w+)'
+)
+
+
+def _parse_schema(
+    categorized: Dict[FileCategory, List[str]],
+) -> Tuple[FrozenSet[str], Dict[str, Dict[str, str]]]:
+    """Parse schema.rb once for known tables and their columns.
+
+    Returns (known_tables, schema_columns) where schema_columns maps
+    table_name -> {column_name: datatype}. Columns come from lines like:
         t.integer "column_name", ...
         t.string "column_name", ...
         t.references :column_name, ...  (stored as column_name_id and column_name_type)
@@ -41,32 +55,50 @@ def _extract_schema_columns(categorized: Dict[FileCategory, List[Path]]) -> Dict
     schema_columns: Dict[str, Dict[str, str]] = {}
     current_table: Optional[str] = None
 
-    create_re = re.compile(r'create_table\s+"(\w+)"')
-    # Matches: t.<type> "col_name" or t.<type> :col_name
-    col_re = re.compile(r'\bt\.(\w+)\s+[":]([\w]+)')
-
     for path in categorized.get(FileCategory.SCHEMA, []):
         try:
-            lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+            data = read_file_bytes(path)
         except OSError:
             continue
 
-        for line in lines:
-            m = create_re.search(line)
-            if m:
-                current_table = m.group(1)
+        if is_plain_ascii(data):
+            # Matched as bytes: only the captured identifiers get decoded
+            text, line_re, create_re, polymorphic = data, _SCHEMA_LINE_RE, _CREATE_TABLE_RE, b"polymorphic:"
+            as_str = bytes.decode
+        else:
+            text = data.decode("utf-8", errors="replace")
+            line_re, create_re, polymorphic = _SCHEMA_LINE_STR_RE, _CREATE_TABLE_STR_RE, "polymorphic:"
+            as_str = str
+        # Lines end where str.splitlines() would end them
+        lines = LineIndex(text)
+
+        # Only the first match on each line counts, as with a per-line search
+        line_end = -1
+        for m in line_re.finditer(text):
+            start = m.start()
+            if start < line_end:
+                continue
+            _, line_start, line_end = lines.locate(start)
+
+            table = m["table"]
+            if table is None:
+                # create_table takes precedence anywhere on the line, even
+                # inside the column match (t.string :xcreate_table "y")
+                later = create_re.search(text, start, line_end)
+                if later:
+                    table = later.group(1)
+            if table is not None:
+                # Interned: every known-table filter below hashes/compares these
+                current_table = sys.intern(as_str(table))
                 schema_columns.setdefault(current_table, {})
                 continue
 
             if current_table is None:
                 continue
 
-            m = col_re.search(line)
-            if not m:
-                continue
-
-            col_type = m.group(1)
-            col_name = m.group(2)
+            # A handful of distinct types, attached to every validated result
+            col_type = sys.intern(as_str(m["col_type"]))
+            col_name = as_str(m["col_name"])
 
             # Skip non-column DSL keywords that match the pattern
             if col_type in ("index", "timestamps", "primary_key"):
@@ -75,58 +107,131 @@ def _extract_schema_columns(categorized: Dict[FileCategory, List[Path]]) -> Dict
             if col_type == "references":
                 # t.references :user  expands to user_id + user_type (if polymorphic)
                 schema_columns[current_table][f"{col_name}_id"] = "bigint"
-                if "polymorphic:" in line or "polymorphic: true" in line:
+                if polymorphic in text[line_start:line_end]:
                     schema_columns[current_table][f"{col_name}_type"] = "string"
             else:
                 schema_columns[current_table][col_name] = col_type
 
-    return schema_columns
+    return frozenset(schema_columns), schema_columns
+
+
+# Reverse-direction association results.
+# MODEL_HAS_MANY_REVERSE / MODEL_HAS_ONE_REVERSE arise when some other model declares
+# `has_many :table_name` or `has_one :singular`, meaning the scanned table holds a FK
+# pointing back to that other model's table (e.g. orders.user_id → users).
+# That is the opposite of what we are scanning for ("who has a FK to <table>.id"), so
+# including them causes misleading "Evidence for orders.user_id" entries in the UI.
+_REVERSE_TYPES = frozenset({ReferenceType.MODEL_HAS_MANY_REVERSE, ReferenceType.MODEL_HAS_ONE_REVERSE})
 
 
-def _validate_schema_columns(
-    results: List[ScanResult],
+def _check_schema_column(
+    r: ScanResult,
     schema_columns: Dict[str, Dict[str, str]],
     strict_mode: bool,
-) -> List[ScanResult]:
-    """Cross-check each result's (table_name, column_name) against schema.rb.
+) -> Optional[ScanResult]:
+    """Cross-check a result's (table_name, column_name) against schema.rb, in place.
 
-    - strict_mode=True:  remove results where the column is not found in the table.
-    - strict_mode=False: downgrade confidence to LOW and set schema_verified=False.
-    - Attaches column_datatype from schema.rb when available.
+    - Attaches column_datatype from schema.rb when the column exists.
+    - Otherwise: returns None when strict_mode (drop the result), else downgrades
+      confidence to LOW and sets schema_verified=False.
 
-    Results with empty column_name are skipped (table-level references have no column to check).
-    Results for tables not present in schema are left unchanged (they were already filtered
-    by the known-table pass upstream, or schema.rb wasn't available).
+    Results with empty column_name are passed through (table-level references have
+    no column to check), as are results for tables not present in schema.rb.
     """
-    validated: List[ScanResult] = []
-    for r in results:
-        # Nothing to validate when column is unknown/empty
-        if not r.column_name:
-            validated.append(r)
-            continue
+    # Nothing to validate when column is unknown/empty
+    if not r.column_name:
+        return r
+
+    # Table not in schema map -> schema.rb unavailable, pass through
+    table_cols = schema_columns.get(r.table_name)
+    if table_cols is None:
+        return r
+
+    datatype = table_cols.get(r.column_name)
+    if datatype is not None:
+        # Column confirmed present — attach datatype
+        r.column_datatype = datatype
+        return r
+
+    # Column NOT present in schema: drop entirely in strict mode
+    if strict_mode:
+        return None
+    r.schema_verified = False
+    # Downgrade to LOW regardless of original confidence
+    r.confidence = Confidence.LOW
+    return r
+
+
+def _make_scanner(
+    scanner_cls,
+    table_name: str,
+    fk_column: str,
+    known_tables: FrozenSet[str],
+    file_cache: Optional[FileCache] = None,
+):
+    if scanner_cls is ModelScanner:
+        return scanner_cls(table_name, fk_column=fk_column, known_tables=known_tables, file_cache=file_cache)
+    return scanner_cls(table_name, fk_column=fk_column, file_cache=file_cache)
 
-        # Table not in schema map -> schema.rb unavailable, pass through
-        if r.table_name not in schema_columns:
-            validated.append(r)
-            continue
 
-        table_cols = schema_columns[r.table_name]
-        if r.column_name in table_cols:
-            # Column confirmed present — attach datatype
-            r.column_datatype = table_cols[r.column_name]
-            validated.append(r)
-        else:
-            # Column NOT present in schema
-            if strict_mode:
-                # Drop entirely
-                pass
-            else:
-                r.schema_verified = False
-                # Downgrade to LOW regardless of original confidence
-                r.confidence = Confidence.LOW
-                validated.append(r)
+def _is_fusable(scanner_cls) -> bool:
+    """True for scanners that look at one file at a time (the inherited scan_all).
+
+    PolymorphicScanner overrides scan_all to correlate files across passes, so
+    it can neither share the fused pass nor be split into shards.
+    """
+    return scanner_cls.scan_all is BaseScanner.scan_all
+
+
+def _run_scanner(
+    scanner_cls,
+    table_name: str,
+    fk_column: str,
+    known_tables: FrozenSet[str],
+    categorized: Dict[FileCategory, List[str]],
+) -> ResultColumns:
+    """Process-pool entry point: run one scanner over all collected files."""
+    scanner = _make_scanner(scanner_cls, table_name, fk_column, known_tables)
+    return pack_results(scanner.scan_all(categorized))
 
-    return validated
+
+def _run_fused(
+    scanner_classes: List[type],
+    table_name: str,
+    fk_column: str,
+    known_tables: FrozenSet[str],
+    categorized: Dict[FileCategory, List[str]],
+) -> List[ResultColumns]:
+    """Process-pool entry point: run the fusable scanners over a shard of files."""
+    scanners = [
+        _make_scanner(cls, table_name, fk_column, known_tables) for cls in scanner_classes
+    ]
+    return [pack_results(results) for results in scan_fused(scanners, categorized)]
+
+
+# Below this many scanner-file visits, process start-up and pickling cost more
+# than the scan itself, so run_scan stays in-process unless workers is given
+_MIN_PARALLEL_FILES = 2000
+# Smallest shard worth a task of its own
+_MIN_SHARD_FILES = 200
+
+
+def _shard_files(
+    categorized: Dict[FileCategory, List[str]],
+    categories: List[FileCategory],
+    workers: int,
+) -> List[Dict[FileCategory, List[str]]]:
+    """Split the files in categories into contiguous shards, one process-pool task each."""
+    files = [(cat, path) for cat in categories for path in categorized.get(cat, [])]
+    # A few shards per worker keeps the pool busy while stragglers finish
+    size = max(_MIN_SHARD_FILES, -(-len(files) // (workers * 4)))
+    shards = []
+    for start in range(0, len(files), size):
+        shard: Dict[FileCategory, List[str]] = {}
+        for cat, path in files[start:start + size]:
+            shard.setdefault(cat, []).append(path)
+        shards.append(shard)
+    return shards
 
 
 def run_scan(
@@ -137,12 +242,20 @@ def run_scan(
     strict_mode: bool = False,
     progress_cb: Optional[Callable[[str, str], None]] = None,
     cancel_check: Optional[Callable[[], bool]] = None,
+    workers: Optional[int] = None,
+    use_cache: bool = True,
 ) -> Dict:
     """Run all scanners and return results dict (no file I/O).
 
     Returns dict with keys: results (List[ScanResult]), stats (dict).
     progress_cb(phase, detail) is called to report progress.
     cancel_check() should return True if the scan should abort.
+    workers sets how many scanner processes run at once (default: the CPU
+    count, or in-process for small repos); each scanner's files are split into
+    shards so the processes share the work. workers <= 1 runs in-process with
+    per-file progress.
+    use_cache reuses the file list and schema parse from a previous scan of
+    the same git checkout (see cache.py).
     """
     def _progress(phase: str, detail: str = ""):
         if progress_cb:
@@ -151,43 +264,128 @@ def run_scan(
     def _cancelled() -> bool:
         return cancel_check() if cancel_check else False
 
-    _progress("collecting", "Collecting files...")
-    categorized = collect_files(repo_path)
-    total_files = sum(len(v) for v in categorized.values())
+    # Bad names would only fail once the scanners are built; fail before the walk
+    check_identifier(table_name, "table name")
+    if fk_column:
+        check_identifier(fk_column, "FK column")
+
+    # Cached file lists hold absolute paths, so every spelling of the same
+    # checkout (relative, "..", symlinked) must produce the same ones
+    repo_path = repo_path.resolve()
+    key = cache.cache_key(repo_path) if use_cache else None
+    cached = cache.load(key) if key else None
+    if cached:
+        _progress("collecting", "Using cached file list and schema...")
+        categorized, known_tables, schema_columns = cached
+    else:
+        _progress("collecting", "Collecting files...")
+        categorized = collect_files(repo_path)
 
-    if _cancelled():
-        return {"results": [], "stats": {}}
+        if _cancelled():
+            return {"results": [], "stats": {}}
 
-    _progress("parsing_schema", "Parsing schema.rb...")
-    known_tables = _extract_known_tables(categorized)
-    schema_columns = _extract_schema_columns(categorized)
+        _progress("parsing_schema", "Parsing schema.rb...")
+        known_tables, schema_columns = _parse_schema(categorized)
+        if key:
+            cache.save(key, (categorized, known_tables, schema_columns))
+
+    total_files = sum(len(v) for v in categorized.values())
 
     if _cancelled():
         return {"results": [], "stats": {}}
 
     # Calculate total files across all scanners for accurate progress
-    scan_file_count = 0
+    files_per_scanner: Dict[type, int] = {}
     for scanner_cls in ALL_SCANNERS:
-        for cat in scanner_cls.applicable_categories:
-            scan_file_count += len(categorized.get(cat, []))
+        files_per_scanner[scanner_cls] = sum(
+            len(categorized.get(cat, [])) for cat in scanner_cls.applicable_categories
+        )
+    scan_file_count = sum(files_per_scanner.values())
 
-    all_results: List[ScanResult] = []
-    scanner_hits: Dict[str, int] = {}
+    results_by_scanner: Dict[type, List[ScanResult]] = {}
     files_processed = 0
 
-    def _on_file():
-        nonlocal files_processed
-        files_processed += 1
-        _progress("scanning", f"Scanning files... ({files_processed}/{scan_file_count})")
+    if workers is None:
+        workers = (os.cpu_count() or 1) if scan_file_count >= _MIN_PARALLEL_FILES else 1
+
+    fused_classes = [cls for cls in ALL_SCANNERS if _is_fusable(cls)]
+    fused_categories = [
+        cat for cat in FileCategory
+        if any(cat in cls.applicable_categories for cls in fused_classes)
+    ]
+
+    if workers <= 1:
+        def _on_files(n: int = 1):
+            nonlocal files_processed
+            files_processed += n
+            _progress("scanning", f"Scanning files... ({files_processed}/{scan_file_count})")
+
+        # One pass over the files runs every per-file scanner; the cross-file
+        # scanners then reread through the same cache
+        file_cache = FileCache()
+        scanners = [
+            _make_scanner(cls, table_name, fk_column, known_tables, file_cache)
+            for cls in fused_classes
+        ]
+        fused = scan_fused(scanners, categorized, file_cache, _on_files, _cancelled)
+        if fused is None:
+            return {"results": [], "stats": {}}
+        results_by_scanner.update(zip(fused_classes, fused))
 
+        for scanner_cls in ALL_SCANNERS:
+            if scanner_cls in results_by_scanner:
+                continue
+            if _cancelled():
+                return {"results": [], "stats": {}}
+            scanner = _make_scanner(scanner_cls, table_name, fk_column, known_tables, file_cache)
+            results_by_scanner[scanner_cls] = scanner.scan_all(categorized, on_file=_on_files)
+    else:
+        # Files are independent and scanning is CPU-bound (regex over every
+        # line), so the fused pass is sharded across processes; cross-file
+        # scanners get a task each. Progress advances once per finished task.
+        _progress("scanning", f"Scanning files... (0/{scan_file_count})")
+        shards = _shard_files(categorized, fused_categories, workers)
+        shard_results: List[Optional[List[ResultColumns]]] = [None] * len(shards)
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            pending = {}
+            for idx, shard in enumerate(shards):
+                fut = pool.submit(_run_fused, fused_classes, table_name, fk_column, known_tables, shard)
+                visits = sum(
+                    len(shard.get(cat, [])) for cls in fused_classes for cat in cls.applicable_categories
+                )
+                pending[fut] = (idx, visits)
+            for scanner_cls in ALL_SCANNERS:
+                if scanner_cls not in fused_classes:
+                    fut = pool.submit(_run_scanner, scanner_cls, table_name, fk_column, known_tables, categorized)
+                    pending[fut] = (scanner_cls, files_per_scanner[scanner_cls])
+            while pending:
+                # Time out periodically so a cancel request is noticed mid-task
+                done, _ = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                if _cancelled():
+                    return {"results": [], "stats": {}}
+                for fut in done:
+                    task, n_files = pending.pop(fut)
+                    if isinstance(task, int):
+                        shard_results[task] = fut.result()
+                    else:
+                        results_by_scanner[task] = unpack_results(fut.result())
+                    files_processed += n_files
+                    _progress("scanning", f"Scanning files... ({files_processed}/{scan_file_count})")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        # Concatenate shards in order; each shard returns one list per scanner
+        for i, scanner_cls in enumerate(fused_classes):
+            results_by_scanner[scanner_cls] = [
+                r for part in shard_results for r in unpack_results(part[i])
+            ]
+
+    # Merge in registry order so output and stats don't depend on completion order
+    all_results: List[ScanResult] = []
+    scanner_hits: Dict[str, int] = {}
     for scanner_cls in ALL_SCANNERS:
-        if _cancelled():
-            return {"results": [], "stats": {}}
-        if scanner_cls is ModelScanner:
-            scanner = scanner_cls(table_name, fk_column=fk_column, known_tables=known_tables)
-        else:
-            scanner = scanner_cls(table_name, fk_column=fk_column)
-        results = scanner.scan_all(categorized, on_file=_on_file)
+        results = results_by_scanner[scanner_cls]
         if results:
             scanner_hits[scanner_cls.__name__] = len(results)
         all_results.extend(results)
@@ -196,45 +394,54 @@ def run_scan(
         return {"results": [], "stats": {}}
 
     _progress("processing", "Deduplicating and filtering results...")
-    deduped = _deduplicate(all_results)
-
-    # Remove reverse-direction association results.
-    # MODEL_HAS_MANY_REVERSE / MODEL_HAS_ONE_REVERSE arise when some other model declares
-    # `has_many :table_name` or `has_one :singular`, meaning the scanned table holds a FK
-    # pointing back to that other model's table (e.g. orders.user_id → users).
-    # That is the opposite of what we are scanning for ("who has a FK to <table>.id"), so
-    # including them causes misleading "Evidence for orders.user_id" entries in the UI.
-    _REVERSE_TYPES = {ReferenceType.MODEL_HAS_MANY_REVERSE, ReferenceType.MODEL_HAS_ONE_REVERSE}
-    deduped = [r for r in deduped if r.reference_type not in _REVERSE_TYPES]
+    repo_prefix = str(repo_path)
+    validated_count = 0
+    filtered: List[ScanResult] = []
+    rel_paths: Dict[str, str] = {}
+
+    # Single pass over the deduplicated results applying every filter in turn
+    for r in _deduplicate(all_results):
+        # Reverse-direction associations point away from the target table
+        if r.reference_type in _REVERSE_TYPES:
+            continue
 
-    # Filter out results where the child table isn't a real database table
-    if known_tables:
-        deduped = [r for r in deduped if r.table_name in known_tables]
+        table = r.table_name
+        # Filter out results where the child table isn't a real database table
+        if known_tables and table not in known_tables:
+            continue
 
-    # Exclude the target table itself — it's the parent, not a child dependency
-    deduped = [r for r in deduped if r.table_name != table_name]
+        # Exclude the target table itself — it's the parent, not a child dependency
+        if table == table_name:
+            continue
 
-    # Validate (table, column) pairs against schema.rb column map
-    if schema_columns:
-        deduped = _validate_schema_columns(deduped, schema_columns, strict_mode=strict_mode)
+        # Validate (table, column) pairs against schema.rb column map
+        if schema_columns and _check_schema_column(r, schema_columns, strict_mode) is None:
+            continue
+        validated_count += 1
 
-    filtered = [r for r in deduped if r.confidence >= min_confidence]
+        if r.confidence < min_confidence:
+            continue
 
-    confidence_order = {Confidence.HIGH: 0, Confidence.MEDIUM: 1, Confidence.LOW: 2}
-    filtered.sort(key=lambda r: (confidence_order[r.confidence], r.file_path, r.line_number))
+        # Strip repo_path prefix for cleaner output. Results from one file share
+        # one path string, so build each relative path once and share it too.
+        path = r.file_path
+        rel = rel_paths.get(path)
+        if rel is None:
+            rel = path[len(repo_prefix):].lstrip("/") if path.startswith(repo_prefix) else path
+            rel_paths[path] = rel
+        r.file_path = rel
+        filtered.append(r)
 
-    # Strip repo_path prefix for cleaner output
-    for r in filtered:
-        if r.file_path.startswith(str(repo_path)):
-            r.file_path = r.file_path[len(str(repo_path)):].lstrip("/")
+    # HIGH first: negate the IntEnum value so the key is a plain tuple compare
+    filtered.sort(key=lambda r: (-r.confidence, r.file_path, r.line_number))
 
     return {
         "results": filtered,
         "stats": {
             "total_files_scanned": total_files,
             "raw_hits": len(all_results),
-            "after_dedup": len(deduped),
-            "after_schema_validation": len(deduped),  # already filtered in-place above
+            "after_dedup": validated_count,
+            "after_schema_validation": validated_count,
             "after_filter": len(filtered),
             "scanner_hits": scanner_hits,
         },
@@ -249,11 +456,13 @@ def run(
     min_confidence: Confidence,
     table_name: str,
     strict_mode: bool = False,
+    use_cache: bool = True,
+    full_clone: bool = False,
 ):
     cloned_path = None
     try:
         if repo:
-            repo_path = clone_repo(repo)
+            repo_path = clone_repo(repo, full_clone=full_clone)
             cloned_path = repo_path.parent  # temp dir containing "repo/"
         else:
             repo_path = Path(local_path)
@@ -263,18 +472,22 @@ def run(
 
         print(f"Scanning {repo_path} for '{table_name}' references...", file=sys.stderr)
 
-        scan_data = run_scan(repo_path, table_name, min_confidence, strict_mode=strict_mode)
+        # A fresh temp clone is never scanned twice, so don't cache it
+        scan_data = run_scan(
+            repo_path, table_name, min_confidence,
+            strict_mode=strict_mode, use_cache=use_cache and not repo,
+        )
         filtered = scan_data["results"]
         stats = scan_data["stats"]
 
         print(f"Found {stats['total_files_scanned']} scannable files.", file=sys.stderr)
         for name, count in stats["scanner_hits"].items():
             print(f"  {name}: {count} hits", file=sys.stderr)
-        print(f"\n{stats['after_filter']} results (min confidence: {min_confidence.value}).", file=sys.stderr)
+        print(f"\n{stats['after_filter']} results (min confidence: {min_confidence.name}).", file=sys.stderr)
 
         # Write output
         if output:
-            with open(output, "w", newline="") as f:
+            with open(output, "w", newline="", buffering=1 << 20) as f:
                 write_csv(filtered, f)
             print(f"Results written to {output}", file=sys.stderr)
         else:
@@ -287,9 +500,10 @@ def run(
 
 
 def _deduplicate(results: List[ScanResult]) -> List[ScanResult]:
-    best = {}
+    best: Dict[tuple, ScanResult] = {}
     for r in results:
         key = r.dedup_key
-        if key not in best or r.confidence > best[key].confidence:
+        cur = best.get(key)
+        if cur is None or r.confidence > cur.confidence:
             best[key] = r
     return list(best.values())
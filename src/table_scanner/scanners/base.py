@@ -2,14 +2,193 @@
 
 from __future__ import annotations
 
+import re
 import sys
 from abc import ABC, abstractmethod
-from pathlib import Path
-from typing import Callable, Dict, List, Optional
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+from ..file_collector import read_file_bytes
 from ..inflection import singularize
 from ..models import FileCategory, ScanResult
 
+# Everything str.splitlines() treats as a line boundary
+LINE_BREAK_RE = re.compile(r'\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+# Whitespace that never crosses a line boundary: use in place of \s in patterns
+# run over whole-file text so a match stays within one line
+HSPACE = r'[^\S\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]'
+
+
+def line_bounds(text: str) -> Tuple[List[int], List[int]]:
+    """Return (starts, ends) offsets of each line, numbered as by str.splitlines()."""
+    starts = [0]
+    ends = []
+    for m in LINE_BREAK_RE.finditer(text):
+        ends.append(m.start())
+        starts.append(m.end())
+    ends.append(len(text))
+    return starts, ends
+
+
+# Line boundaries other than "\n". Checked with one str "in" each: a memchr
+# per character beats a character-class regex search over the whole file.
+_OTHER_BREAKS = "\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+# ASCII characters str.splitlines() breaks on besides "\n", plus \x1f, which
+# str patterns' \s matches but bytes patterns' \s doesn't
+_NOT_PLAIN_ASCII = (b"\r", b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e", b"\x1f")
+
+
+def is_plain_ascii(data: bytes) -> bool:
+    """True if data can be matched as raw bytes instead of decoded text.
+
+    On pure-ASCII data with "\n"-only line breaks, bytes patterns compiled from
+    the same ASCII source match exactly like their str versions, and
+    data.split(b"\n") gives the lines of str.splitlines() (plus possibly a
+    trailing empty one), so the file never has to be decoded.
+    """
+    return data.isascii() and not any(c in data for c in _NOT_PLAIN_ASCII)
+
+
+# Reported code snippets are cut to this many characters
+SNIPPET_LEN = 200
+_NON_SPACE_RE = re.compile(r'\S')
+
+
+# Files longer than this are split into lines a block at a time
+LINE_BLOCK = 1 << 20
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Yield the lines of text.splitlines(), holding one block's worth at a time.
+
+    A huge schema.rb as one list of line strings costs about twice the text
+    again; cutting it at "\n" boundaries keeps splitting in C while only
+    ~LINE_BLOCK characters of lines are alive at once. Text with other line
+    breaks is split whole.
+    """
+    n = len(text)
+    if n <= LINE_BLOCK or any(c in text for c in _OTHER_BREAKS):
+        yield from text.splitlines()
+        return
+    pos = 0
+    while pos < n:
+        cut = text.find("\n", pos + LINE_BLOCK)
+        if cut == -1:
+            yield from text[pos:].splitlines()
+            return
+        # Include the "\n" so a trailing empty line in the block is kept
+        yield from text[pos:cut + 1].splitlines()
+        pos = cut + 1
+
+
+class SequencePattern:
+    """Search for parts in order, like re.compile(".*".join(parts)).search.
+
+    A ".*" between two subpatterns makes re retry every later end for every
+    start, quadratic or worse on a long line without a match. Whether a match
+    exists only depends on the first match of each part after the previous
+    one, so parts are searched one after another in linear time. Only the
+    truthiness of the result is meaningful, and like "." the gaps never span
+    a "\n": use it on single lines.
+    """
+
+    def __init__(self, *parts: str, flags: int = 0):
+        self._parts = tuple(re.compile(part, flags) for part in parts)
+
+    def search(self, text: str) -> Optional[re.Match]:
+        pos = 0
+        m = None
+        for part in self._parts:
+            m = part.search(text, pos)
+            if m is None:
+                return None
+            pos = m.end()
+        return m
+
+
+class LineIndex:
+    """Resolve offsets in text to lines, numbered as by str.splitlines().
+
+    Almost every file breaks lines with "\n" only; then lookups use C-level
+    count / find from the previous offset, so nothing is done for lines
+    without a match. Other line breaks fall back to line_bounds() and bisect.
+    Lookups are cheapest with increasing offsets, as from finditer. bytes
+    text must pass is_plain_ascii(). newline_only tells whether every line
+    break is "\n", so a run of whole lines sliced from the text equals
+    "\n".join() of those lines.
+    """
+
+    def __init__(self, text: Union[str, bytes]):
+        self._text = text
+        self._pos = 0
+        self._idx = 0
+        if isinstance(text, bytes):
+            self._nl = b"\n"
+            self._bounds = None
+        else:
+            self._nl = "\n"
+            self._bounds = line_bounds(text) if any(c in text for c in _OTHER_BREAKS) else None
+        self.newline_only = self._bounds is None
+
+    def locate(self, offset: int) -> Tuple[int, int, int]:
+        """Return (0-based line index, line start, line end) for offset."""
+        text = self._text
+        if self._bounds is not None:
+            starts, ends = self._bounds
+            idx = bisect_right(starts, offset) - 1
+            return idx, starts[idx], ends[idx]
+        nl = self._nl
+        if offset < self._pos:
+            self._pos = self._idx = 0
+        self._idx += text.count(nl, self._pos, offset)
+        self._pos = offset
+        end = text.find(nl, offset)
+        return self._idx, text.rfind(nl, 0, offset) + 1, len(text) if end == -1 else end
+
+
+# UTF-8 encodings of the non-ASCII letters re.IGNORECASE folds onto ASCII ones
+# (U+0130, U+0131 -> i, U+017F -> s, U+212A -> k). bytes.lower() leaves them
+# alone, so a case-insensitive prefilter must let files containing them through.
+_IGNORECASE_FOLDS = tuple(c.encode("utf-8") for c in "\u0130\u0131\u017f\u212a")
+
+
+# Table and column names are Rails identifiers. Anything matching this has no
+# regex metacharacters, so scanners splice names into patterns unescaped.
+_IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+def check_identifier(name: str, what: str) -> str:
+    """Return name, or raise ValueError if it isn't a plain identifier."""
+    if not _IDENTIFIER_RE.fullmatch(name):
+        raise ValueError(f"Invalid {what} {name!r}: expected letters, digits and underscores")
+    return name
+
+
+class FileCache:
+    """File contents shared by the scanners running in one process.
+
+    Scanners sweep the whole file list one after another, so an LRU would have
+    evicted every file by the time the next scanner reaches it. Instead the
+    first files read are kept until max_bytes is used up; files past the
+    budget are read straight from disk every time.
+    """
+
+    def __init__(self, max_bytes: int = 256 << 20):
+        self._data: Dict[str, bytes] = {}
+        self._free = max_bytes
+
+    def get(self, path: str) -> bytes:
+        """Return path's contents, reading it on first use. Raises OSError."""
+        data = self._data.get(path)
+        if data is None:
+            data = read_file_bytes(path)
+            if len(data) <= self._free:
+                self._data[path] = data
+                self._free -= len(data)
+        return data
+
 
 class BaseScanner(ABC):
     """Base class for all scanners."""
@@ -17,41 +196,151 @@ class BaseScanner(ABC):
     # Subclasses set which file categories they handle.
     applicable_categories: List[FileCategory] = []
 
-    def __init__(self, table_name: str, fk_column: str = ""):
-        self.table_name = table_name
+    def __init__(self, table_name: str, fk_column: str = "", file_cache: Optional[FileCache] = None):
+        # Interned: every result carries these, and they are compared against
+        # interned schema / known-table names downstream
+        self.table_name = sys.intern(check_identifier(table_name, "table name"))
         # Derive the singular form using proper inflection rules
-        self.singular = singularize(table_name)
+        self.singular = sys.intern(singularize(table_name))
         # Allow overriding the FK column name (default: singular + "_id")
-        self.fk_column = fk_column or f"{self.singular}_id"
+        self.fk_column = sys.intern(check_identifier(fk_column or f"{self.singular}_id", "FK column"))
+        # File-level prefilter, see _set_prefilter(). Empty scans every file.
+        self._needles: Tuple[bytes, ...] = ()
+        self._needles_ignorecase = False
+        self._file_cache = file_cache
+
+    def _set_prefilter(self, *literals: str, ignorecase: bool = False):
+        """Skip files containing none of literals.
+
+        Subclasses call this with literals at least one of which every match
+        needs, so a single C-level bytes search rejects most files before they
+        are decoded or split into lines.
+        """
+        if ignorecase:
+            literals = tuple(lit.lower() for lit in literals)
+        self._needles = tuple(dict.fromkeys(lit.encode("utf-8") for lit in literals))
+        self._needles_ignorecase = ignorecase
+
+    def _may_match(self, data: bytes) -> bool:
+        needles = self._needles
+        if not needles:
+            return True
+        if self._needles_ignorecase:
+            if any(f in data for f in _IGNORECASE_FOLDS):
+                return True
+            data = data.lower()
+        return any(n in data for n in needles)
 
     def scan_all(
         self,
-        categorized_files: Dict[FileCategory, List[Path]],
+        categorized_files: Dict[FileCategory, List[str]],
         on_file: Optional[Callable[[], None]] = None,
     ) -> List[ScanResult]:
         results = []
         for cat in self.applicable_categories:
             for path in categorized_files.get(cat, []):
-                lines = self._read_file(path)
-                if lines is not None:
-                    results.extend(self.scan_file(path, lines, cat))
+                data = self._read_bytes(path)
+                if data is not None and self._may_match(data):
+                    results.extend(self.scan_text(path, data.decode("utf-8", "replace"), cat))
                 if on_file:
                     on_file()
         return results
 
     @abstractmethod
     def scan_file(
-        self, path: Path, lines: List[str], category: FileCategory
+        self, path: str, lines: Iterable[str], category: FileCategory
     ) -> List[ScanResult]:
         ...
 
-    @staticmethod
-    def _read_file(path: Path) -> List[str] | None:
+    def scan_text(self, path: str, text: str, category: FileCategory) -> List[ScanResult]:
+        """Scan a whole file's contents. Defaults to scan_file over its lines;
+        scanners that match across the whole buffer override this."""
+        return self.scan_file(path, iter_lines(text), category)
+
+    def _read_bytes(self, path: str) -> bytes | None:
         try:
-            return path.read_text(encoding="utf-8", errors="replace").splitlines()
+            if self._file_cache is not None:
+                return self._file_cache.get(path)
+            return read_file_bytes(path)
         except OSError as e:
             print(f"Warning: cannot read {path}: {e}", file=sys.stderr)
             return None
 
+    def _read_file(self, path: str) -> List[str] | None:
+        data = self._read_bytes(path)
+        return data.decode("utf-8", "replace").splitlines() if data is not None else None
+
     def _snippet(self, line: str) -> str:
-        return line.strip()[:200]
+        """Return line.strip()[:SNIPPET_LEN], without copying all of a long line."""
+        if len(line) <= 2 * SNIPPET_LEN:
+            return line.strip()[:SNIPPET_LEN]
+        # strip() removes exactly what \s matches
+        m = _NON_SPACE_RE.search(line)
+        if m is None:
+            return ""
+        start = m.start()
+        end = start + SNIPPET_LEN
+        if _NON_SPACE_RE.search(line, end) is None:
+            return line[start:end].rstrip()
+        return line[start:end]
+
+
+def scan_fused(
+    scanners: List[BaseScanner],
+    categorized_files: Dict[FileCategory, List[str]],
+    file_cache: Optional[FileCache] = None,
+    on_files: Optional[Callable[[int], None]] = None,
+    cancel_check: Optional[Callable[[], bool]] = None,
+) -> Optional[List[List[ScanResult]]]:
+    """Run several scanners in one pass over the files.
+
+    Each file is read, decoded and split into lines once, then handed to
+    every scanner that applies to its category, instead of once per scanner.
+    Returns one result list per scanner, identical to what its scan_all would
+    return, or None if cancel_check() asked to stop. on_files(n) reports n
+    more scanner-file visits. Scanners that override scan_all (cross-file
+    passes) are not supported; run those separately.
+    """
+    # Results are bucketed per (scanner, category) so each scanner's list comes
+    # out in its own applicable_categories order
+    buckets: List[Dict[FileCategory, List[ScanResult]]] = [
+        {cat: [] for cat in s.applicable_categories} for s in scanners
+    ]
+    for cat in FileCategory:
+        applicable = [
+            (s, bucket[cat]) for s, bucket in zip(scanners, buckets) if cat in bucket
+        ]
+        if not applicable:
+            continue
+        for path in categorized_files.get(cat, []):
+            if cancel_check and cancel_check():
+                return None
+            try:
+                data = file_cache.get(path) if file_cache is not None else read_file_bytes(path)
+            except OSError as e:
+                print(f"Warning: cannot read {path}: {e}", file=sys.stderr)
+                data = None
+            if data is not None:
+                text = lines = None
+                for scanner, out in applicable:
+                    if not scanner._may_match(data):
+                        continue
+                    if text is None:
+                        text = data.decode("utf-8", "replace")
+                    if type(scanner).scan_text is BaseScanner.scan_text:
+                        if len(text) > LINE_BLOCK:
+                            # Streamed to each scanner rather than held as one list
+                            out.extend(scanner.scan_file(path, iter_lines(text), cat))
+                            continue
+                        if lines is None:
+                            lines = text.splitlines()
+                        out.extend(scanner.scan_file(path, lines, cat))
+                    else:
+                        out.extend(scanner.scan_text(path, text, cat))
+            if on_files:
+                on_files(len(applicable))
+
+    return [
+        [r for cat in s.applicable_categories for r in bucket[cat]]
+        for s, bucket in zip(scanners, buckets)
+    ]
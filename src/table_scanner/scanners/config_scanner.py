@@ -1,42 +1,49 @@
 """Scan YAML config files for table name references."""
 
+import os
 import re
-from pathlib import Path
-from typing import List
+from typing import Iterable, List, Optional
 
 from ..models import Confidence, FileCategory, ReferenceType, ScanResult
-from .base import BaseScanner
+from .base import BaseScanner, FileCache
 
 
 class ConfigScanner(BaseScanner):
     applicable_categories = [FileCategory.YML]
 
-    def scan_file(self, path: Path, lines: List[str], category: FileCategory) -> List[ScanResult]:
+    def __init__(self, table_name: str, fk_column: str = "", file_cache: Optional[FileCache] = None):
+        super().__init__(table_name, fk_column, file_cache)
+        self._set_prefilter(self.table_name)
+        table = self.table_name
+        self._table_re = re.compile(rf'\b{table}\b')
+        self._comment_re = re.compile(r'^\s*#')
+        # Either form marks a MEDIUM-confidence reference:
+        # key-value with the table name, or a singular-prefixed identifier
+        self._medium_re = re.compile(rf':\s*{table}\b|\b{self.singular}_')
+
+    def scan_file(self, path: str, lines: Iterable[str], category: FileCategory) -> List[ScanResult]:
         results = []
         table_name = self.table_name
-        singular = self.singular
 
         # Skip database.yml — table names there are DB names, not references
-        if path.name == "database.yml":
+        if os.path.basename(path) == "database.yml":
             return results
 
-        table_re = re.compile(rf'\b{re.escape(table_name)}\b')
-        comment_re = re.compile(r'^\s*#')
+        table_re = self._table_re
+        comment_re = self._comment_re
+        medium_re = self._medium_re
 
         for i, line in enumerate(lines, 1):
-            if comment_re.match(line):
+            # Most lines never mention the table; a substring test rejects them
+            # before either regex runs
+            if table_name not in line or comment_re.match(line):
                 continue
             if table_re.search(line):
                 # Determine confidence: key-value with table name is MEDIUM, else LOW
-                if re.search(rf':\s*{re.escape(table_name)}\b', line):
-                    confidence = Confidence.MEDIUM
-                elif re.search(rf'\b{re.escape(singular)}_', line):
-                    confidence = Confidence.MEDIUM
-                else:
-                    confidence = Confidence.LOW
+                confidence = Confidence.MEDIUM if medium_re.search(line) else Confidence.LOW
 
                 results.append(ScanResult(
-                    file_path=str(path), line_number=i,
+                    file_path=path, line_number=i,
                     table_name=table_name, column_name="",
                     reference_type=ReferenceType.CONFIG_TABLE_REF,
                     code_snippet=self._snippet(line),
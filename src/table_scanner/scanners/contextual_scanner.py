@@ -1,11 +1,15 @@
 """Heuristic catch-all scanner for contextual table references."""
 
 import re
-from pathlib import Path
-from typing import List
+from typing import Iterable, List, Optional
 
 from ..models import Confidence, FileCategory, ReferenceType, ScanResult
-from .base import BaseScanner
+from .base import BaseScanner, FileCache, LineIndex, SequencePattern, iter_lines
+
+_QUERY_KEYWORDS = (
+    "query", "execute", "select", "where", "find_by",
+    "pluck", "update_all", "delete_all", "sql", "connection",
+)
 
 
 class ContextualScanner(BaseScanner):
@@ -16,45 +20,90 @@ class ContextualScanner(BaseScanner):
         FileCategory.SQL,
     ]
 
-    def scan_file(self, path: Path, lines: List[str], category: FileCategory) -> List[ScanResult]:
-        results = []
+    def __init__(self, table_name: str, fk_column: str = "", file_cache: Optional[FileCache] = None):
+        super().__init__(table_name, fk_column, file_cache)
+        # Both checks need the singular
+        self._set_prefilter(self.singular, ignorecase=True)
+        self._singular_lower = self.singular.lower()
         singular = self.singular
-        table_name = self.table_name
-
         # Variable/method names that look table-related
-        var_re = re.compile(rf'\b{re.escape(singular)}[s]?[\w]*\b', re.IGNORECASE)
+        self._var_re = re.compile(rf'\b{singular}[s]?[\w]*\b', re.IGNORECASE)
         # Query-adjacent keywords
-        query_re = re.compile(
-            r'\b(query|execute|select|where|find_by|pluck|update_all|delete_all|sql|connection)\b',
+        self._query_re = re.compile(
+            rf'\b({"|".join(_QUERY_KEYWORDS)})\b',
             re.IGNORECASE,
         )
         # Comment mentioning target table + schema keywords
-        comment_re = re.compile(r'#.*\b' + re.escape(singular), re.IGNORECASE)
-        schema_kw_re = re.compile(
+        self._comment_re = SequencePattern(r'#', rf'\b{singular}', flags=re.IGNORECASE)
+        self._schema_kw_re = re.compile(
             r'\b(table|column|foreign[_ ]?key|fk|migration|schema|index)\b',
             re.IGNORECASE,
         )
 
+    def scan_file(self, path: str, lines: Iterable[str], category: FileCategory) -> List[ScanResult]:
+        results: List[ScanResult] = []
+        singular_lower = self._singular_lower
+
         for i, line in enumerate(lines, 1):
-            # Variable near query code
-            if var_re.search(line) and query_re.search(line):
-                results.append(ScanResult(
-                    file_path=str(path), line_number=i,
-                    table_name=table_name, column_name="",
-                    reference_type=ReferenceType.CONTEXTUAL_VARIABLE,
-                    code_snippet=self._snippet(line),
-                    confidence=Confidence.LOW,
-                ))
-                continue
-
-            # Comment mentioning target table + schema keywords
-            if comment_re.search(line) and schema_kw_re.search(line):
-                results.append(ScanResult(
-                    file_path=str(path), line_number=i,
-                    table_name=table_name, column_name="",
-                    reference_type=ReferenceType.CONTEXTUAL_COMMENT,
-                    code_snippet=self._snippet(line),
-                    confidence=Confidence.LOW,
-                ))
+            # Cheap substring prefilter before any regex. Only exact for ASCII
+            # lines: IGNORECASE also folds a few non-ASCII letters (e.g. U+017F
+            # matches "s") that lower() leaves alone.
+            if line.isascii():
+                lowered = line.lower()
+                if singular_lower not in lowered:
+                    continue
+                # Neither branch can fire without a query keyword or a comment
+                if "#" not in line and not any(k in lowered for k in _QUERY_KEYWORDS):
+                    continue
+            self._scan_line(path, i, line, results)
+
+        return results
 
+    def scan_text(self, path: str, text: str, category: FileCategory) -> List[ScanResult]:
+        # The substring prefilter is only exact for ASCII; other text goes
+        # through the line loop
+        if not text.isascii():
+            return self.scan_file(path, iter_lines(text), category)
+
+        # Every reported line names the singular: find those in the lowered
+        # text with str.find rather than visiting every line
+        results: List[ScanResult] = []
+        singular_lower = self._singular_lower
+        lowered = text.lower()
+        index = LineIndex(text)
+        pos = lowered.find(singular_lower)
+        while pos != -1:
+            idx, start, end = index.locate(pos)
+            line_lower = lowered[start:end]
+            if "#" in line_lower or any(k in line_lower for k in _QUERY_KEYWORDS):
+                self._scan_line(path, idx + 1, text[start:end], results)
+            pos = lowered.find(singular_lower, end)
         return results
+
+    def _scan_line(self, path: str, i: int, line: str, results: List[ScanResult]):
+        """Check one line that passed the prefilter, appending any result."""
+        # Both checks need the singular at a word start, which is exactly what
+        # var_re looks for, so lines without it are skipped after one search
+        if not self._var_re.search(line):
+            return
+
+        # Variable near query code
+        if self._query_re.search(line):
+            results.append(ScanResult(
+                file_path=path, line_number=i,
+                table_name=self.table_name, column_name="",
+                reference_type=ReferenceType.CONTEXTUAL_VARIABLE,
+                code_snippet=self._snippet(line),
+                confidence=Confidence.LOW,
+            ))
+            return
+
+        # Comment mentioning target table + schema keywords
+        if self._comment_re.search(line) and self._schema_kw_re.search(line):
+            results.append(ScanResult(
+                file_path=path, line_number=i,
+                table_name=self.table_name, column_name="",
+                reference_type=ReferenceType.CONTEXTUAL_COMMENT,
+                code_snippet=self._snippet(line),
+                confidence=Confidence.LOW,
+            ))
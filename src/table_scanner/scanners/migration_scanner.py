@@ -1,99 +1,98 @@
 """Parse migration files for target table references."""
 
 import re
-from pathlib import Path
-from typing import List
+from itertools import chain
+from typing import Iterable, List, Optional
 
 from ..models import Confidence, FileCategory, ReferenceType, ScanResult
-from .base import BaseScanner
+from .base import HSPACE, BaseScanner, FileCache, LineIndex
+
+# Migration operations: when several appear on one line the lowest rank wins.
+# group -> (rank, reference type, confidence, group capturing the table; None
+# for t.references, which applies to the enclosing create_table)
+_OPS = {
+    "add_ref": (0, ReferenceType.MIGRATION_ADD_REFERENCE, Confidence.HIGH, "add_ref_table"),
+    "add_col": (1, ReferenceType.MIGRATION_ADD_COLUMN, Confidence.HIGH, "add_col_table"),
+    "add_fk": (2, ReferenceType.MIGRATION_ADD_FOREIGN_KEY, Confidence.HIGH, "add_fk_table"),
+    "t_ref": (3, ReferenceType.MIGRATION_CREATE_TABLE_REF, Confidence.HIGH, None),
+    "remove_ref": (4, ReferenceType.MIGRATION_REMOVE, Confidence.MEDIUM, "remove_ref_table"),
+    "remove_col": (5, ReferenceType.MIGRATION_REMOVE, Confidence.MEDIUM, "remove_col_table"),
+}
 
 
 class MigrationScanner(BaseScanner):
     applicable_categories = [FileCategory.MIGRATION]
 
-    def scan_file(self, path: Path, lines: List[str], category: FileCategory) -> List[ScanResult]:
-        results = []
+    def __init__(self, table_name: str, fk_column: str = "", file_cache: Optional[FileCache] = None):
+        super().__init__(table_name, fk_column, file_cache)
         singular = self.singular
-        table_name = self.table_name
+        table = self.table_name
         col_id = self.fk_column
-        current_table = None
-
-        create_re = re.compile(r'create_table\s+[:"]([\w]+)')
-
-        add_ref_re = re.compile(
-            rf'add_reference\s+:(\w+)\s*,\s*:({re.escape(singular)})\b'
-        )
-        add_col_re = re.compile(
-            rf'add_column\s+:(\w+)\s*,\s*:({re.escape(col_id)})\s*,'
-        )
-        add_fk_re = re.compile(
-            rf'add_foreign_key\s+:(\w+)\s*,\s*:({re.escape(table_name)})\b'
-        )
-        t_ref_re = re.compile(
-            rf't\.references\s+:({re.escape(singular)})\b'
-        )
-        remove_ref_re = re.compile(
-            rf'remove_reference\s+:(\w+)\s*,\s*:({re.escape(singular)})\b'
-        )
-        remove_col_re = re.compile(
-            rf'remove_column\s+:(\w+)\s*,\s*:({re.escape(col_id)})\b'
-        )
+        s = HSPACE
 
-        for i, line in enumerate(lines, 1):
-            m = create_re.search(line)
-            if m:
-                current_table = m.group(1)
+        # One alternation for every statement we care about, run over the whole
+        # file. Each alternative consumes only its keyword and checks the rest
+        # in a lookahead: no keyword contains another, so finditer never hides
+        # one statement inside another's match (a greedy create_table name
+        # would swallow a statement glued onto it). HSPACE keeps every match on
+        # one line. The <op>_table groups capture the affected table.
+        self._stmt_re = re.compile("|".join([
+            rf'(?P<create>create_table(?={s}+[:"](?P<create_table>[\w]+)))',
+            rf'(?P<add_ref>add_reference(?={s}+:(?P<add_ref_table>\w+){s}*,{s}*:{singular}\b))',
+            rf'(?P<add_col>add_column(?={s}+:(?P<add_col_table>\w+){s}*,{s}*:{col_id}{s}*,))',
+            rf'(?P<add_fk>add_foreign_key(?={s}+:(?P<add_fk_table>\w+){s}*,{s}*:{table}\b))',
+            rf'(?P<t_ref>t\.references(?={s}+:{singular}\b))',
+            rf'(?P<remove_ref>remove_reference(?={s}+:(?P<remove_ref_table>\w+){s}*,{s}*:{singular}\b))',
+            rf'(?P<remove_col>remove_column(?={s}+:(?P<remove_col_table>\w+){s}*,{s}*:{col_id}\b))',
+        ]))
+        # Every reported statement names one of these literally
+        self._set_prefilter(self.singular, self.table_name, self.fk_column)
 
-            if line.strip() == "end":
-                pass  # Don't reset — migrations can have nested blocks
+    def scan_file(self, path: str, lines: Iterable[str], category: FileCategory) -> List[ScanResult]:
+        return self.scan_text(path, "\n".join(lines), category)
 
-            m = add_ref_re.search(line)
-            if m:
-                results.append(ScanResult(
-                    file_path=str(path), line_number=i,
-                    table_name=m.group(1), column_name=col_id,
-                    reference_type=ReferenceType.MIGRATION_ADD_REFERENCE,
-                    code_snippet=self._snippet(line), confidence=Confidence.HIGH,
-                ))
-                continue
-
-            m = add_col_re.search(line)
-            if m:
-                results.append(ScanResult(
-                    file_path=str(path), line_number=i,
-                    table_name=m.group(1), column_name=col_id,
-                    reference_type=ReferenceType.MIGRATION_ADD_COLUMN,
-                    code_snippet=self._snippet(line), confidence=Confidence.HIGH,
-                ))
-                continue
-
-            m = add_fk_re.search(line)
-            if m:
-                results.append(ScanResult(
-                    file_path=str(path), line_number=i,
-                    table_name=m.group(1), column_name=col_id,
-                    reference_type=ReferenceType.MIGRATION_ADD_FOREIGN_KEY,
-                    code_snippet=self._snippet(line), confidence=Confidence.HIGH,
-                ))
-                continue
+    def scan_text(self, path: str, text: str, category: FileCategory) -> List[ScanResult]:
+        results = []
+        col_id = self.fk_column
+        current_table = None
 
-            m = t_ref_re.search(line)
-            if m:
-                results.append(ScanResult(
-                    file_path=str(path), line_number=i,
-                    table_name=current_table or "unknown", column_name=col_id,
-                    reference_type=ReferenceType.MIGRATION_CREATE_TABLE_REF,
-                    code_snippet=self._snippet(line), confidence=Confidence.HIGH,
-                ))
-                continue
+        # Matches arrive in text order, so each line is settled as soon as a
+        # match past its end shows up (or the text runs out): its first
+        # create_table, then its highest-priority operation. The None sentinel
+        # flushes the last line.
+        lines = None
+        line_idx = line_start = 0
+        line_end = -1
+        create = best = best_op = None
+        for m in chain(self._stmt_re.finditer(text), (None,)):
+            if m is None or m.start() >= line_end:
+                # Migrations can have nested blocks, so current_table is never reset
+                if create is not None:
+                    current_table = create.group("create_table")
+                if best_op is not None:
+                    _, ref_type, confidence, table_group = best_op
+                    target = best.group(table_group) if table_group else current_table or "unknown"
+                    results.append(ScanResult(
+                        file_path=path, line_number=line_idx + 1,
+                        table_name=target, column_name=col_id,
+                        reference_type=ref_type,
+                        code_snippet=self._snippet(text[line_start:line_end]),
+                        confidence=confidence,
+                    ))
+                if m is None:
+                    break
+                if lines is None:
+                    lines = LineIndex(text)
+                line_idx, line_start, line_end = lines.locate(m.start())
+                create = best = best_op = None
 
-            m = remove_ref_re.search(line) or remove_col_re.search(line)
-            if m:
-                results.append(ScanResult(
-                    file_path=str(path), line_number=i,
-                    table_name=m.group(1), column_name=col_id,
-                    reference_type=ReferenceType.MIGRATION_REMOVE,
-                    code_snippet=self._snippet(line), confidence=Confidence.MEDIUM,
-                ))
+            group = m.lastgroup
+            if group == "create":
+                if create is None:
+                    create = m
+            else:
+                op = _OPS[group]
+                if best_op is None or op[0] < best_op[0]:
+                    best_op, best = op, m
 
         return results
@@ -1,65 +1,89 @@
 """Parse ActiveRecord model files for target table associations."""
 
 import re
-from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import AbstractSet, Dict, Iterable, List, Optional, Tuple
 
 from ..inflection import class_name_to_table_name, singularize
 from ..models import Confidence, FileCategory, ReferenceType, ScanResult
-from .base import BaseScanner
+from .base import BaseScanner, FileCache
 
 
 class ModelScanner(BaseScanner):
     applicable_categories = [FileCategory.MODEL]
 
-    def __init__(self, table_name: str, fk_column: str = "", known_tables: Optional[Set[str]] = None):
-        super().__init__(table_name, fk_column)
+    def __init__(
+        self,
+        table_name: str,
+        fk_column: str = "",
+        known_tables: Optional[AbstractSet[str]] = None,
+        file_cache: Optional[FileCache] = None,
+    ):
+        super().__init__(table_name, fk_column, file_cache)
         # Used to resolve model class names -> real table names via schema.rb
-        self._known_tables: Set[str] = known_tables or set()
+        self._known_tables: AbstractSet[str] = known_tables or frozenset()
+        # class name -> (owner table, owner FK). Class names repeat across files
+        # (STI subclasses, reopened classes), so keep it for the scanner's lifetime.
+        self._owners: Dict[str, Tuple[str, str]] = {}
+
+        # Every association form names the table, the singular or its class
+        self._set_prefilter(self.table_name, self.singular, self.singular.capitalize())
 
-    def scan_file(self, path: Path, lines: List[str], category: FileCategory) -> List[ScanResult]:
-        results = []
         singular = self.singular
+        table = self.table_name
+        self._class_re = re.compile(r'class\s+(\w+)\s*<')
+        # foreign_key extraction
+        self._fk_re = re.compile(r"foreign_key:\s*['\"](\w+)['\"]")
+        # All association forms in one alternation, in priority order. Each
+        # alternative consumes only its keyword and checks the rest in a
+        # lookahead, so a greedy .* can't swallow a later association on the
+        # line (finditer resumes right after the keyword). Alternatives sharing
+        # a keyword (has_many / belongs_to) list the more specific one first.
+        self._assoc_re = re.compile("|".join([
+            # has_many :something, through: :orders
+            rf'(?P<through>has_many(?=\s+:(\w+)\s*,.*through:\s*:{table}\b))',
+            # Indirect: belongs_to :something, class_name: 'Order'
+            r"(?P<indirect>belongs_to(?=\s+:(?P<indirect_name>\w+).*class_name:\s*['\"]"
+            + self.singular.capitalize()
+            + r"['\"]))",
+            rf'(?P<belongs>belongs_to(?=\s+:{singular}\b))',
+            rf'(?P<has_many>has_many(?=\s+:{table}\b))',
+            rf'(?P<has_one>has_one(?=\s+:{singular}\b))',
+        ]))
+
+    def scan_file(self, path: str, lines: Iterable[str], category: FileCategory) -> List[ScanResult]:
+        results = []
         table_name = self.table_name
         col_id = self.fk_column
         current_class = None
-
-        class_re = re.compile(r'class\s+(\w+)\s*<')
-        belongs_re = re.compile(rf'belongs_to\s+:({re.escape(singular)})\b')
-        has_many_re = re.compile(rf'has_many\s+:({re.escape(table_name)})\b')
-        has_one_re = re.compile(rf'has_one\s+:({re.escape(singular)})\b')
-
-        # Indirect: belongs_to :something, class_name: 'Order'
-        indirect_re = re.compile(
-            r"belongs_to\s+:(\w+).*class_name:\s*['\"]"
-            + re.escape(singular.capitalize())
-            + r"['\"]"
-        )
-        # foreign_key extraction
-        fk_re = re.compile(r"foreign_key:\s*['\"](\w+)['\"]")
-
-        # has_many :something, through: :orders
-        through_re = re.compile(
-            rf'has_many\s+:(\w+)\s*,.*through:\s*:({re.escape(table_name)})\b'
-        )
+        # Resolved lazily: most classes in a model file never match an association
+        owner = owner_fk = None
+        class_re = self._class_re
+        assoc_re = self._assoc_re
+        fk_re = self._fk_re
 
         for i, line in enumerate(lines, 1):
-            m = class_re.search(line)
-            if m:
-                current_class = m.group(1)
+            if "class" in line:
+                m = class_re.search(line)
+                if m:
+                    current_class = m.group(1)
+                    owner = None
+
+            found = {}
+            for m in assoc_re.finditer(line):
+                found.setdefault(m.lastgroup, m)
+            if not found:
+                continue
 
-            owner = self._class_to_table(current_class) if current_class else "unknown"
-            # Derive the FK that the owner table would hold if it belongs_to target
-            owner_singular = singularize(owner)
-            owner_fk = f"{owner_singular}_id"
+            if owner is None:
+                owner, owner_fk = self._owner(current_class)
 
             # has_many :something, through: :orders
             # The owner does NOT hold the FK -- this is a join-table traversal.
             # Report as a reference on the target table side with no specific FK column.
-            m = through_re.search(line)
+            m = found.get("through")
             if m:
                 results.append(ScanResult(
-                    file_path=str(path), line_number=i,
+                    file_path=path, line_number=i,
                     table_name=owner, column_name="",
                     reference_type=ReferenceType.MODEL_HAS_MANY_THROUGH,
                     code_snippet=self._snippet(line), confidence=Confidence.MEDIUM,
@@ -68,12 +92,12 @@ class ModelScanner(BaseScanner):
 
             # belongs_to :something, class_name: 'Order'
             # The owner table holds the FK column (e.g. something_id or explicit foreign_key:)
-            m = indirect_re.search(line)
+            m = found.get("indirect")
             if m:
                 fk_match = fk_re.search(line)
-                col = fk_match.group(1) if fk_match else f"{m.group(1)}_id"
+                col = fk_match.group(1) if fk_match else f"{m.group('indirect_name')}_id"
                 results.append(ScanResult(
-                    file_path=str(path), line_number=i,
+                    file_path=path, line_number=i,
                     table_name=owner, column_name=col,
                     reference_type=ReferenceType.MODEL_INDIRECT_ASSOCIATION,
                     code_snippet=self._snippet(line), confidence=Confidence.MEDIUM,
@@ -81,13 +105,13 @@ class ModelScanner(BaseScanner):
                 continue
 
             # belongs_to :order  →  FK (order_id) lives on the OWNER table
-            m = belongs_re.search(line)
+            m = found.get("belongs")
             if m:
                 # Check for explicit foreign_key: option
                 fk_match = fk_re.search(line)
                 actual_col = fk_match.group(1) if fk_match else col_id
                 results.append(ScanResult(
-                    file_path=str(path), line_number=i,
+                    file_path=path, line_number=i,
                     table_name=owner, column_name=actual_col,
                     reference_type=ReferenceType.MODEL_BELONGS_TO,
                     code_snippet=self._snippet(line), confidence=Confidence.HIGH,
@@ -96,13 +120,13 @@ class ModelScanner(BaseScanner):
 
             # has_many :orders  →  FK ({owner_singular}_id) lives on the TARGET table (orders)
             # This is the REVERSE direction: we report on the target table, not the owner.
-            m = has_many_re.search(line)
+            m = found.get("has_many")
             if m:
                 # Check for explicit foreign_key: option
                 fk_match = fk_re.search(line)
                 actual_col = fk_match.group(1) if fk_match else owner_fk
                 results.append(ScanResult(
-                    file_path=str(path), line_number=i,
+                    file_path=path, line_number=i,
                     table_name=table_name, column_name=actual_col,
                     reference_type=ReferenceType.MODEL_HAS_MANY_REVERSE,
                     code_snippet=self._snippet(line), confidence=Confidence.HIGH,
@@ -110,12 +134,12 @@ class ModelScanner(BaseScanner):
                 continue
 
             # has_one :order  →  FK ({owner_singular}_id) lives on the TARGET table (orders)
-            m = has_one_re.search(line)
+            m = found.get("has_one")
             if m:
                 fk_match = fk_re.search(line)
                 actual_col = fk_match.group(1) if fk_match else owner_fk
                 results.append(ScanResult(
-                    file_path=str(path), line_number=i,
+                    file_path=path, line_number=i,
                     table_name=table_name, column_name=actual_col,
                     reference_type=ReferenceType.MODEL_HAS_ONE_REVERSE,
                     code_snippet=self._snippet(line), confidence=Confidence.HIGH,
@@ -123,6 +147,16 @@ class ModelScanner(BaseScanner):
 
         return results
 
+    def _owner(self, class_name: Optional[str]) -> Tuple[str, str]:
+        """Return (owner table, owner FK column) for the enclosing class, memoized."""
+        key = class_name or ""
+        cached = self._owners.get(key)
+        if cached is None:
+            owner = self._class_to_table(class_name) if class_name else "unknown"
+            # Derive the FK that the owner table would hold if it belongs_to target
+            cached = self._owners[key] = (owner, f"{singularize(owner)}_id")
+        return cached
+
     def _class_to_table(self, class_name: str) -> str:
         """Convert a CamelCase model class name to a snake_case table name.
 
@@ -1,20 +1,55 @@
 """Detect polymorphic associations that may reference the target table."""
 
 import re
-from pathlib import Path
-from typing import Callable, Dict, List, Optional, Set, Tuple
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from ..models import Confidence, FileCategory, ReferenceType, ScanResult
-from .base import BaseScanner
+from .base import HSPACE, BaseScanner, FileCache, LineIndex, is_plain_ascii
+
+
+# Every schema.rb line pass 1 cares about, in one alternation. {s} is
+# whitespace that can't cross a line break, so the whole file is searched at
+# once. No alternative can occur inside another's match, so finditer sees all.
+_SCHEMA_PATTERN = (
+    r'create_table{s}+"(?P<create>\w+)"'
+    r'|t\.string{s}+"(?P<type>\w+)_type"'
+    r'|t\.(?:integer|bigint){s}+"(?P<id>\w+)_id"'
+)
+_SCHEMA_RE = re.compile(_SCHEMA_PATTERN.format(s=HSPACE))
+# For plain-ASCII files (see is_plain_ascii), matched undecoded
+_SCHEMA_RE_BYTES = re.compile(_SCHEMA_PATTERN.format(s=r"[^\S\n]").encode())
+
+# Pass 3 searches these in order and stops once every prefix has evidence, so
+# the categories most likely to set a _type column come first
+_EVIDENCE_CATEGORIES = [
+    FileCategory.MODEL, FileCategory.RUBY_OTHER, FileCategory.MIGRATION,
+    FileCategory.ERB, FileCategory.SQL,
+]
 
 
 class PolymorphicScanner(BaseScanner):
     applicable_categories = [FileCategory.SCHEMA, FileCategory.MODEL]
 
-    def scan_file(self, path: Path, lines: List[str], category: FileCategory) -> List[ScanResult]:
+    def __init__(self, table_name: str, fk_column: str = "", file_cache: Optional[FileCache] = None):
+        super().__init__(table_name, fk_column, file_cache)
+        # CamelCase model class: "order" -> "Order", "order_item" -> "OrderItem"
+        self._model_class = "".join(w.capitalize() for w in self.singular.split("_"))
+        # has_many/has_one :orders (or :order), as: :prefix
+        as_pattern = (
+            rf'(?:has_many|has_one)\s+:({self.table_name}|{self.singular})\s*,.*as:\s*:(\w+)'
+        )
+        self._as_re = re.compile(as_pattern)
+        self._as_re_bytes = re.compile(as_pattern.encode("utf-8"))
+        # model_class as a quoted string literal: "Order" or 'Order'
+        self._model_class_quoted_re = re.compile(
+            r'''['"]{model_class}['"]'''.replace("{model_class}", self._model_class)
+        )
+
+    def scan_file(self, path: str, lines: Iterable[str], category: FileCategory) -> List[ScanResult]:
         return []  # Not used — scan_all is overridden
 
-    def scan_all(self, categorized_files: Dict[FileCategory, List[Path]], on_file: Optional[Callable[[], None]] = None) -> List[ScanResult]:
+    def scan_all(self, categorized_files: Dict[FileCategory, List[str]], on_file: Optional[Callable[[], None]] = None) -> List[ScanResult]:
         """Three-pass approach:
         1. Parse schema.rb for polymorphic _type/_id column pairs
         2. Check model files for `has_many/has_one :table, as: :poly` (HIGH)
@@ -22,40 +57,59 @@ class PolymorphicScanner(BaseScanner):
         Only report pairs with evidence from pass 2 or 3.
         """
         table_name = self.table_name
-        singular = self.singular
-        # CamelCase model class: "order" -> "Order", "order_item" -> "OrderItem"
-        model_class = "".join(w.capitalize() for w in singular.split("_"))
 
         # Pass 1: find all polymorphic _type/_id pairs in schema
         poly_pairs: Dict[Tuple[str, str], Tuple[int, str]] = {}
         for schema_path in categorized_files.get(FileCategory.SCHEMA, []):
-            lines = self._read_file(schema_path)
-            if not lines:
+            data = self._read_bytes(schema_path)
+            if not data:
                 continue
+            # schema.rb is nearly always plain ASCII: match it undecoded and
+            # decode only the captured names and snippets
+            if is_plain_ascii(data):
+                text, schema_re, decode = data, _SCHEMA_RE_BYTES, bytes.decode
+            else:
+                text, schema_re, decode = data.decode("utf-8", "replace"), _SCHEMA_RE, str
+
             current_table = None
             type_cols: Dict[str, int] = {}
             id_cols: Dict[str, Tuple[int, str]] = {}
 
-            for i, line in enumerate(lines, 1):
-                m = re.search(r'create_table\s+"(\w+)"', line)
-                if m:
-                    if current_table:
-                        for prefix in type_cols:
-                            if prefix in id_cols:
-                                poly_pairs[(current_table, prefix)] = id_cols[prefix]
-                    current_table = m.group(1)
-                    type_cols = {}
-                    id_cols = {}
-                    continue
-
-                if current_table and current_table != table_name:
-                    tm = re.search(r't\.string\s+"(\w+)_type"', line)
-                    if tm:
-                        type_cols[tm.group(1)] = i
-
-                    im = re.search(r't\.(integer|bigint)\s+"(\w+)_id"', line)
-                    if im:
-                        id_cols[im.group(2)] = (i, self._snippet(line))
+            # Matches arrive in text order, so each line is settled once a
+            # match past its end shows up; only the first match of each kind
+            # on a line counts, as with a per-line search. The None sentinel
+            # flushes the last line.
+            lines = LineIndex(text)
+            line_idx = line_start = 0
+            line_end = -1
+            found: Dict[str, re.Match] = {}
+            for m in chain(schema_re.finditer(text), (None,)):
+                if m is None or m.start() >= line_end:
+                    if found:
+                        cm = found.get("create")
+                        if cm:
+                            if current_table:
+                                for prefix in type_cols:
+                                    if prefix in id_cols:
+                                        poly_pairs[(current_table, prefix)] = id_cols[prefix]
+                            current_table = decode(cm.group("create"))
+                            type_cols = {}
+                            id_cols = {}
+                        elif current_table and current_table != table_name:
+                            tm = found.get("type")
+                            if tm:
+                                type_cols[decode(tm.group("type"))] = line_idx + 1
+
+                            im = found.get("id")
+                            if im:
+                                id_cols[decode(im.group("id"))] = (
+                                    line_idx + 1, self._snippet(decode(text[line_start:line_end])),
+                                )
+                        found = {}
+                    if m is None:
+                        break
+                    line_idx, line_start, line_end = lines.locate(m.start())
+                found.setdefault(m.lastgroup, m)
 
             if current_table:
                 for prefix in type_cols:
@@ -66,18 +120,26 @@ class PolymorphicScanner(BaseScanner):
             return []
 
         # Pass 2: check model files for `has_many/has_one :table, as: :prefix` (HIGH)
+        poly_prefixes = {prefix for (_, prefix) in poly_pairs}
         confirmed_prefixes: Set[str] = set()
         for model_path in categorized_files.get(FileCategory.MODEL, []):
-            model_lines = self._read_file(model_path)
-            if not model_lines:
+            data = self._read_bytes(model_path)
+            # as_re needs "as:"; most model files have no polymorphic association
+            if not data or b"as:" not in data:
                 continue
-            for line in model_lines:
-                m = re.search(
-                    rf'(?:has_many|has_one)\s+:({re.escape(table_name)}|{re.escape(singular)})\s*,.*as:\s*:(\w+)',
-                    line,
-                )
-                if m:
-                    confirmed_prefixes.add(m.group(2))
+            if is_plain_ascii(data):
+                for line in data.split(b"\n"):
+                    m = self._as_re_bytes.search(line)
+                    if m:
+                        confirmed_prefixes.add(m.group(2).decode())
+            else:
+                for line in data.decode("utf-8", "replace").splitlines():
+                    m = self._as_re.search(line)
+                    if m:
+                        confirmed_prefixes.add(m.group(2))
+            # Only schema prefixes matter; stop once every one is confirmed
+            if poly_prefixes <= confirmed_prefixes:
+                break
 
         # Pass 3: search all code files for evidence linking a polymorphic _type
         # to the target model class. E.g.:
@@ -93,37 +155,54 @@ class PolymorphicScanner(BaseScanner):
         # Matching bare constant references causes false positives when a target table
         # has a same-named column (e.g. orders.status_type) that is populated via
         # Ruby constants rather than as a polymorphic discriminator.
-        unconfirmed_prefixes = {
-            prefix for (_, prefix) in poly_pairs if prefix not in confirmed_prefixes
-        }
+        unconfirmed_prefixes = poly_prefixes - confirmed_prefixes
         evidence_prefixes: Set[str] = set()
 
+        # Nothing left to prove when pass 2 confirmed every prefix
         if unconfirmed_prefixes:
-            all_code_categories = [
-                FileCategory.MODEL, FileCategory.RUBY_OTHER, FileCategory.ERB,
-                FileCategory.SQL, FileCategory.MIGRATION,
+            # Requires model_class as a quoted string literal: "Order" or 'Order'
+            model_class_quoted_re = self._model_class_quoted_re
+            model_class_bytes = self._model_class.encode("utf-8")
+            # (prefix, _type column name, same as bytes) still lacking evidence
+            pending = [
+                (prefix, f"{prefix}_type", f"{prefix}_type".encode("utf-8"))
+                for prefix in sorted(unconfirmed_prefixes)
             ]
-            # Build patterns that require model_class as a quoted string literal:
-            #   "Order"  or  'Order'
-            model_class_quoted_re = re.compile(
-                r'''['"]{model_class}['"]'''.replace("{model_class}", re.escape(model_class))
-            )
 
-            for cat in all_code_categories:
+            for cat in _EVIDENCE_CATEGORIES:
                 for file_path in categorized_files.get(cat, []):
-                    file_lines = self._read_file(file_path)
-                    if not file_lines:
+                    data = self._read_bytes(file_path)
+                    # Evidence needs the class name and a column name somewhere in
+                    # the file; only those columns are tested on its lines
+                    if not data or model_class_bytes not in data:
+                        continue
+                    file_cols = [(p, col) for p, col, col_bytes in pending if col_bytes in data]
+                    if not file_cols:
                         continue
-                    for line in file_lines:
-                        for prefix in list(unconfirmed_prefixes):
-                            type_col = f"{prefix}_type"
-                            # Require BOTH the _type column name AND the model class
-                            # as a quoted string on the same line.
-                            if type_col in line and model_class_quoted_re.search(line):
-                                evidence_prefixes.add(prefix)
-                                unconfirmed_prefixes.discard(prefix)
-                        if not unconfirmed_prefixes:
-                            break
+                    text = data.decode("utf-8", "replace")
+                    # Require BOTH the _type column name AND the model class as
+                    # a quoted string on the same line. Quoted class names are
+                    # rare, so find those lines with one search over the file and
+                    # test the column names only there, instead of every prefix
+                    # against every line.
+                    lines = None
+                    last_idx = -1
+                    for m in model_class_quoted_re.finditer(text):
+                        if lines is None:
+                            lines = LineIndex(text)
+                        idx, start, end = lines.locate(m.start())
+                        if idx == last_idx:
+                            continue
+                        last_idx = idx
+                        line = text[start:end]
+                        found = [p for p, col in file_cols if col in line]
+                        if found:
+                            evidence_prefixes.update(found)
+                            unconfirmed_prefixes.difference_update(found)
+                            file_cols = [(p, col) for p, col in file_cols if p in unconfirmed_prefixes]
+                            pending = [entry for entry in pending if entry[0] in unconfirmed_prefixes]
+                            if not file_cols:
+                                break
                     if not unconfirmed_prefixes:
                         break
                 if not unconfirmed_prefixes:
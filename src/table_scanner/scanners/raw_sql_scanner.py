@@ -1,11 +1,50 @@
 """Scan for raw SQL references to the target table."""
 
 import re
-from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple, Union
 
 from ..models import Confidence, FileCategory, ReferenceType, ScanResult
-from .base import BaseScanner
+from .base import BaseScanner, FileCache, LineIndex, SequencePattern, iter_lines
+
+_HEREDOC_START_RE = re.compile(r'<<[-~]?(\w*SQL\w*)')
+
+
+def _word(lit: str) -> str:
+    """Pattern for lit starting at a word boundary, written so it begins with lit.
+
+    Equivalent to rf'\b{lit}' for a lit starting with a word character, but
+    re only scans ahead for a literal prefix, which a leading \b (or lookbehind)
+    hides. The boundary is checked by a lookbehind after the literal instead.
+    """
+    return rf'{lit}(?<!\w{lit})'
+
+
+def _compile(pattern: Union[str, Tuple[str, ...]], flags: int = 0) -> Union[Pattern[str], SequencePattern]:
+    """Compile a line pattern; a tuple is a sequence of parts ".*"-separated."""
+    if isinstance(pattern, tuple):
+        return SequencePattern(*pattern, flags=flags)
+    return re.compile(pattern, flags)
+
+
+# Line pattern kinds in priority order: a line reports only its highest-priority
+# hit. kind -> (reference type, confidence)
+_LINE_KINDS = {
+    "join": (ReferenceType.RAW_SQL_JOIN, Confidence.MEDIUM),
+    "dml": (ReferenceType.RAW_SQL_TABLE_REF, Confidence.HIGH),
+    "col": (ReferenceType.RAW_SQL_COLUMN_REF, Confidence.HIGH),
+    "qmethod": (ReferenceType.RAW_SQL_QUERY_METHOD, Confidence.MEDIUM),
+    "interp": (ReferenceType.RAW_SQL_INTERPOLATION, Confidence.LOW),
+}
+
+
+def _needles(*literals: str) -> Tuple[str, ...]:
+    """Lowercase literals for a substring prefilter, minus any containing another.
+
+    A line without "order" cannot contain "orders" or "order_id", so for most
+    tables this leaves a single needle.
+    """
+    lowered = set(lit.lower() for lit in literals if lit)
+    return tuple(sorted(n for n in lowered if not any(o != n and o in n for o in lowered)))
 
 
 class RawSqlScanner(BaseScanner):
@@ -17,172 +56,231 @@ class RawSqlScanner(BaseScanner):
         FileCategory.MIGRATION,
     ]
 
-    def scan_file(self, path: Path, lines: List[str], category: FileCategory) -> List[ScanResult]:
-        results = []
+    def __init__(self, table_name: str, fk_column: str = "", file_cache: Optional[FileCache] = None):
+        super().__init__(table_name, fk_column, file_cache)
         singular = self.singular
         table_name = self.table_name
         col_id = self.fk_column
 
-        # Precompile patterns
-        # HIGH: orders.id or order_id in SQL-like context
-        col_ref_re = re.compile(
-            rf'\b{re.escape(table_name)}\.id\b|(?<!\w){re.escape(col_id)}(?!\w)',
-            re.IGNORECASE,
-        )
-        # HIGH: FROM/UPDATE/INSERT INTO/DELETE FROM orders
-        table_dml_re = re.compile(
-            rf'\b(?:FROM|UPDATE|INSERT\s+INTO|DELETE\s+FROM)\s+[`"]?{re.escape(table_name)}[`"]?\b',
-            re.IGNORECASE,
-        )
-        # MEDIUM: JOIN orders ON ...
-        join_re = re.compile(
-            rf'\bJOIN\s+[`"]?{re.escape(table_name)}[`"]?\s+ON\s+(\w+)\.(\w+)\s*=\s*{re.escape(table_name)}\.(\w+)',
-            re.IGNORECASE,
-        )
-        # MEDIUM: .where/.joins/.includes referencing target table
-        query_method_re = re.compile(
-            rf'\.(where|joins|includes|eager_load|preload|references)\b.*[:(\'\"]{re.escape(singular)}',
-            re.IGNORECASE,
-        )
-        # LOW: string interpolation near target table singular
-        interp_re = re.compile(
-            rf'#\{{.*{re.escape(singular)}.*\}}',
-            re.IGNORECASE,
-        )
+        # A tuple is a SequencePattern: its parts in order with anything between,
+        # searched in linear time
+        patterns = {
+            # MEDIUM: JOIN orders ON ...
+            "join": rf'\bJOIN\s+[`"]?{table_name}[`"]?\s+ON\s+(?P<child_table>\w+)\.(?P<child_col>\w+)\s*=\s*{table_name}\.\w+',
+            # HIGH: FROM/UPDATE/INSERT INTO/DELETE FROM orders
+            "dml": rf'\b(?:FROM|UPDATE|INSERT\s+INTO|DELETE\s+FROM)\s+[`"]?{table_name}[`"]?\b',
+            # HIGH: orders.id or order_id in SQL-like context
+            "col": rf'\b{table_name}\.id\b|(?<!\w){col_id}(?!\w)',
+            # MEDIUM: .where/.joins/.includes referencing target table
+            "qmethod": (r'\.(?:where|joins|includes|eager_load|preload|references)\b', rf'[:(\'\"]{singular}'),
+            # LOW: string interpolation near target table singular
+            "interp": (r'#\{', singular, r'\}'),
+        }
+        # The same patterns for lowercased ASCII text, matched case-sensitively:
+        # without IGNORECASE, and with _word() in place of leading \b, each one
+        # starts with a literal that re can scan for
+        table_lower, singular_lower, col_lower = table_name.lower(), singular.lower(), col_id.lower()
+        lower_patterns = {
+            "join": (
+                rf'{_word("join")}\s+[`"]?{table_lower}[`"]?\s+on\s+'
+                rf'(?P<child_table>\w+)\.(?P<child_col>\w+)\s*=\s*{table_lower}\.\w+'
+            ),
+            "dml": (
+                rf'(?:{_word("from")}|{_word("update")}|{_word("insert")}\s+into|{_word("delete")}\s+from)'
+                rf'\s+[`"]?{table_lower}[`"]?\b'
+            ),
+            "col": rf'{_word(table_lower)}\.id\b|{_word(col_lower)}(?!\w)',
+            "qmethod": (r'\.(?:where|joins|includes|eager_load|preload|references)\b', rf'[:(\'\"]{singular_lower}'),
+            "interp": (r'#\{', singular_lower, r'\}'),
+        }
+        # (kind, pattern) in _LINE_KINDS priority order
+        self._line_checks = [(kind, _compile(patterns[kind], re.IGNORECASE)) for kind in _LINE_KINDS]
+        self._lower_checks = [(kind, _compile(lower_patterns[kind])) for kind in _LINE_KINDS]
+        # join/dml need the table, col the table or FK column, the rest the singular
+        self._line_needles = _needles(table_name, singular, col_id)
+        # Heredoc blocks only run the join/dml/col checks
+        self._block_needles = _needles(table_name, col_id)
+        # The same gates for non-ASCII text, where lower() can't stand in for
+        # IGNORECASE: one literal search instead of the whole cascade
+        self._line_gate = re.compile(f"{table_name}|{singular}|{col_id}", re.IGNORECASE)
+        self._block_gate = re.compile(f"{table_name}|{col_id}", re.IGNORECASE)
+        # Heredoc blocks are checked for the first three independently
+        self._block_checks = self._line_checks[:3]
+        self._lower_block_checks = self._lower_checks[:3]
+        # Every pattern (line or heredoc) names one of these, case-insensitively
+        self._set_prefilter(self.table_name, self.singular, self.fk_column, ignorecase=True)
+
+    def scan_file(self, path: str, lines: Iterable[str], category: FileCategory) -> List[ScanResult]:
+        results = []
+        needles = self._line_needles
+        line_gate = self._line_gate.search
 
         in_heredoc = False
         heredoc_content: List[str] = []
         heredoc_start_line = 0
-        heredoc_end_re = None
+        heredoc_tag = ""
 
         for i, line in enumerate(lines, 1):
+            lowered = None
             # Track heredoc SQL blocks
             if not in_heredoc:
-                hd_match = re.search(r'<<[-~]?(\w*SQL\w*)', line)
+                hd_match = _HEREDOC_START_RE.search(line) if "<<" in line else None
                 if hd_match:
                     in_heredoc = True
                     heredoc_content = []
                     heredoc_start_line = i
-                    heredoc_end_re = re.compile(rf'^\s*{re.escape(hd_match.group(1))}\s*$')
+                    heredoc_tag = hd_match.group(1)
 
             if in_heredoc:
                 heredoc_content.append(line)
-                if heredoc_end_re and heredoc_end_re.match(line) and i > heredoc_start_line:
+                # The closing line is the tag alone; strip() removes exactly the
+                # characters \s matches
+                if i > heredoc_start_line and line.strip() == heredoc_tag:
                     # Scan the full heredoc block
                     full_sql = "\n".join(heredoc_content)
-                    results.extend(
-                        self._scan_sql_block(path, heredoc_start_line, full_sql, table_name, singular, col_id)
-                    )
+                    results.extend(self._scan_sql_block(path, heredoc_start_line, full_sql))
                     in_heredoc = False
                     heredoc_content = []
                 continue
 
+            # Cheap substring prefilter before any regex. Only exact for ASCII
+            # lines: IGNORECASE also folds a few non-ASCII letters that lower()
+            # leaves alone.
+            if line.isascii():
+                lowered = line.lower()
+                if not any(needle in lowered for needle in needles):
+                    continue
+            elif not line_gate(line):
+                continue
+
             # Scan individual line
-            results.extend(self._scan_line(
-                path, i, line, col_ref_re, table_dml_re, join_re,
-                query_method_re, interp_re, table_name, singular, col_id,
-            ))
+            results.extend(self._scan_line(path, i, line, lowered))
 
         return results
 
-    def _scan_line(
-        self, path, i, line, col_ref_re, table_dml_re, join_re,
-        query_method_re, interp_re, table_name, singular, col_id,
-    ) -> List[ScanResult]:
-        results = []
-        snippet = self._snippet(line)
-
-        m = join_re.search(line)
-        if m:
-            child_table, child_col, _ = m.group(1), m.group(2), m.group(3)
-            results.append(ScanResult(
-                file_path=str(path), line_number=i,
-                table_name=child_table, column_name=child_col,
-                reference_type=ReferenceType.RAW_SQL_JOIN,
-                code_snippet=snippet, confidence=Confidence.MEDIUM,
-            ))
-            return results
+    def scan_text(self, path: str, text: str, category: FileCategory) -> List[ScanResult]:
+        # lower() is only exact for IGNORECASE on ASCII text; anything else
+        # goes through the line loop
+        if not text.isascii():
+            return self.scan_file(path, iter_lines(text), category)
+        index = LineIndex(text)
+        # The heredoc opener can't span lines, so one search of the text finds
+        # the first one. Blocks are sliced from the text, which only matches
+        # the line loop's "\n".join() when every break is "\n".
+        opener = _HEREDOC_START_RE.search(text)
+        if opener is not None and not index.newline_only:
+            return self.scan_file(path, iter_lines(text), category)
 
-        if table_dml_re.search(line):
-            results.append(ScanResult(
-                file_path=str(path), line_number=i,
-                table_name=table_name, column_name="",
-                reference_type=ReferenceType.RAW_SQL_TABLE_REF,
-                code_snippet=snippet, confidence=Confidence.HIGH,
-            ))
-            return results
+        results: List[ScanResult] = []
+        lowered = text.lower()
+        pos = 0
+        while opener is not None:
+            idx, start, end = index.locate(opener.start())
+            self._scan_span(path, text, lowered, index, pos, start, results)
+            # The block runs from the opener's line through the first later
+            # line consisting of the tag alone; unterminated, it swallows the
+            # rest of the file
+            tag = opener.group(1)
+            close = text.find(tag, end)
+            while close != -1:
+                _, close_start, close_end = index.locate(close)
+                if text[close_start:close_end].strip() == tag:
+                    break
+                close = text.find(tag, close_end)
+            else:
+                return results
+            results.extend(self._scan_sql_block(path, idx + 1, text[start:close_end]))
+            pos = close_end + 1
+            opener = _HEREDOC_START_RE.search(text, pos)
+        self._scan_span(path, text, lowered, index, pos, len(text), results)
+        return results
 
-        if col_ref_re.search(line):
-            results.append(ScanResult(
-                file_path=str(path), line_number=i,
-                table_name=table_name, column_name=col_id,
-                reference_type=ReferenceType.RAW_SQL_COLUMN_REF,
-                code_snippet=snippet, confidence=Confidence.HIGH,
-            ))
-            return results
+    def _scan_span(
+        self, path: str, text: str, lowered: str, index: LineIndex,
+        lo: int, hi: int, results: List[ScanResult],
+    ):
+        """Scan the whole lines in text[lo:hi] outside heredocs, appending to results.
 
-        if query_method_re.search(line):
-            results.append(ScanResult(
-                file_path=str(path), line_number=i,
-                table_name=table_name, column_name="",
-                reference_type=ReferenceType.RAW_SQL_QUERY_METHOD,
-                code_snippet=snippet, confidence=Confidence.MEDIUM,
-            ))
-            return results
+        Only lines containing a needle can match. Those are found in the
+        lowered text with str.find rather than by visiting every line.
+        """
+        hits: Dict[int, Tuple[int, int]] = {}
+        for needle in self._line_needles:
+            pos = lowered.find(needle, lo, hi)
+            while pos != -1:
+                idx, start, end = index.locate(pos)
+                hits[idx] = (start, end)
+                pos = lowered.find(needle, end, hi)
+        for idx in sorted(hits):
+            start, end = hits[idx]
+            results.extend(self._scan_line(path, idx + 1, text[start:end], lowered[start:end]))
 
-        if interp_re.search(line):
-            results.append(ScanResult(
-                file_path=str(path), line_number=i,
-                table_name=table_name, column_name="",
-                reference_type=ReferenceType.RAW_SQL_INTERPOLATION,
-                code_snippet=snippet, confidence=Confidence.LOW,
-            ))
+    def _scan_line(self, path: str, i: int, line: str, lowered: Optional[str] = None) -> List[ScanResult]:
+        """Scan one line; lowered is line.lower() for an ASCII line, else None."""
+        if lowered is None:
+            checks, subject = self._line_checks, line
+        else:
+            checks, subject = self._lower_checks, lowered
+        for kind, pattern in checks:
+            m = pattern.search(subject)
+            if m:
+                break
+        else:
+            return []
 
-        return results
+        table_name, column_name = self.table_name, ""
+        if kind == "join":
+            # Offsets carry over from lowered, which is only used for ASCII
+            table_name = line[m.start("child_table"):m.end("child_table")]
+            column_name = line[m.start("child_col"):m.end("child_col")]
+        elif kind == "col":
+            column_name = self.fk_column
+        ref_type, confidence = _LINE_KINDS[kind]
+        return [ScanResult(
+            file_path=path, line_number=i,
+            table_name=table_name, column_name=column_name,
+            reference_type=ref_type,
+            code_snippet=self._snippet(line), confidence=confidence,
+        )]
 
-    def _scan_sql_block(
-        self, path, start_line, sql_block, table_name, singular, col_id
-    ) -> List[ScanResult]:
+    def _scan_sql_block(self, path: str, start_line: int, sql_block: str) -> List[ScanResult]:
         """Scan a multi-line heredoc SQL block."""
         results = []
-        join_re = re.compile(
-            rf'\bJOIN\s+[`"]?{re.escape(table_name)}[`"]?\s+ON\s+(\w+)\.(\w+)\s*=\s*{re.escape(table_name)}\.(\w+)',
-            re.IGNORECASE,
-        )
-        table_dml_re = re.compile(
-            rf'\b(?:FROM|UPDATE|INSERT\s+INTO|DELETE\s+FROM)\s+[`"]?{re.escape(table_name)}[`"]?\b',
-            re.IGNORECASE,
-        )
-        col_ref_re = re.compile(
-            rf'\b{re.escape(table_name)}\.id\b|(?<!\w){re.escape(col_id)}(?!\w)',
-            re.IGNORECASE,
-        )
-
-        snippet = sql_block.strip()[:200]
-
-        m = join_re.search(sql_block)
-        if m:
-            results.append(ScanResult(
-                file_path=str(path), line_number=start_line,
-                table_name=m.group(1), column_name=m.group(2),
-                reference_type=ReferenceType.RAW_SQL_JOIN,
-                code_snippet=snippet, confidence=Confidence.MEDIUM,
-            ))
+        (_, join_re), (_, table_dml_re), (_, col_ref_re) = self._block_checks
+        subject = sql_block
+        if sql_block.isascii():
+            subject = sql_block.lower()
+            if not any(needle in subject for needle in self._block_needles):
+                return results
+            (_, join_re), (_, table_dml_re), (_, col_ref_re) = self._lower_block_checks
+        elif not self._block_gate.search(sql_block):
+            return results
+        table_name = self.table_name
+        col_id = self.fk_column
 
-        if table_dml_re.search(sql_block):
-            results.append(ScanResult(
-                file_path=str(path), line_number=start_line,
-                table_name=table_name, column_name="",
-                reference_type=ReferenceType.RAW_SQL_TABLE_REF,
-                code_snippet=snippet, confidence=Confidence.HIGH,
+        # (table, column, reference type, confidence) per check that fires
+        found = []
+        m = join_re.search(subject)
+        if m:
+            found.append((
+                sql_block[m.start("child_table"):m.end("child_table")],
+                sql_block[m.start("child_col"):m.end("child_col")],
+                ReferenceType.RAW_SQL_JOIN, Confidence.MEDIUM,
             ))
+        if table_dml_re.search(subject):
+            found.append((table_name, "", ReferenceType.RAW_SQL_TABLE_REF, Confidence.HIGH))
+        if col_ref_re.search(subject):
+            found.append((table_name, col_id, ReferenceType.RAW_SQL_COLUMN_REF, Confidence.HIGH))
+        if not found:
+            return results
 
-        if col_ref_re.search(sql_block):
+        # Only built for blocks that report something
+        snippet = self._snippet(sql_block)
+        for block_table, column, ref_type, confidence in found:
             results.append(ScanResult(
-                file_path=str(path), line_number=start_line,
-                table_name=table_name, column_name=col_id,
-                reference_type=ReferenceType.RAW_SQL_COLUMN_REF,
-                code_snippet=snippet, confidence=Confidence.HIGH,
+                file_path=path, line_number=start_line,
+                table_name=block_table, column_name=column,
+                reference_type=ref_type,
+                code_snippet=snippet, confidence=confidence,
             ))
-
         return results
@@ -1,37 +1,48 @@
 """Parse schema.rb for target table column references."""
 
 import re
-from pathlib import Path
-from typing import List
+from typing import Iterable, List, Optional
 
 from ..models import Confidence, FileCategory, ReferenceType, ScanResult
-from .base import BaseScanner
+from .base import BaseScanner, FileCache
+
+_CREATE_RE = re.compile(r'create_table\s+"(\w+)"')
 
 
 class SchemaScanner(BaseScanner):
     applicable_categories = [FileCategory.SCHEMA]
 
-    def scan_file(self, path: Path, lines: List[str], category: FileCategory) -> List[ScanResult]:
+    def __init__(self, table_name: str, fk_column: str = "", file_cache: Optional[FileCache] = None):
+        super().__init__(table_name, fk_column, file_cache)
+        singular = self.singular
+        self._col_re = re.compile(
+            rf't\.(integer|bigint|references)\s+"?:?({singular}(?:_id)?)(?!\w)"?'
+        )
+        self._ref_re = re.compile(rf't\.references\s+:({singular})\b')
+        # Both column patterns require the singular
+        self._set_prefilter(self.singular)
+
+    def scan_file(self, path: str, lines: Iterable[str], category: FileCategory) -> List[ScanResult]:
         results = []
         current_table = None
         singular = self.singular
-        table_name = self.table_name
         col_id = self.fk_column
-
-        create_re = re.compile(r'create_table\s+"(\w+)"')
-        col_re = re.compile(
-            rf't\.(integer|bigint|references)\s+"?:?({re.escape(singular)}(?:_id)?)(?!\w)"?'
-        )
-        ref_re = re.compile(rf't\.references\s+:({re.escape(singular)})\b')
+        col_re = self._col_re
+        ref_re = self._ref_re
 
         for i, line in enumerate(lines, 1):
-            m = create_re.search(line)
-            if m:
-                current_table = m.group(1)
+            if "create_table" in line:
+                m = _CREATE_RE.search(line)
+                if m:
+                    current_table = m.group(1)
+
+            # Both column patterns name the singular literally
+            if singular not in line:
+                continue
 
             if ref_re.search(line):
                 results.append(ScanResult(
-                    file_path=str(path),
+                    file_path=path,
                     line_number=i,
                     table_name=current_table or "unknown",
                     column_name=col_id,
@@ -49,7 +60,7 @@ class SchemaScanner(BaseScanner):
                 if col_name == singular:
                     col_name = col_id
                 results.append(ScanResult(
-                    file_path=str(path),
+                    file_path=path,
                     line_number=i,
                     table_name=current_table or "unknown",
                     column_name=col_name,
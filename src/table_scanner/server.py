@@ -5,13 +5,16 @@ from __future__ import annotations
 import json
 import os
 import threading
+import time
 import webbrowser
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii as _encode_str
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from .inflection import singularize
-from .models import Confidence, ScanResult
+from .models import Confidence, ReferenceType, ScanResult
 from .output import write_csv
 from .repo import cleanup, clone_repo
 from .runner import run_scan
@@ -23,14 +26,110 @@ PORT = 8642
 _scan_lock = threading.Lock()
 _scan_thread: Optional[threading.Thread] = None
 _scan_cancelled = threading.Event()
-_scan_progress: Dict[str, Any] = {"phase": "idle", "detail": ""}
-_scan_result: Optional[Dict[str, Any]] = None
+# (phase, detail), replaced whole on every update so readers never see a
+# half-written state
+_scan_progress: Tuple[str, str] = ("idle", "")
+# (progress tuple, encoded "scanning" response for it). The client polls far
+# more often than progress changes, so each state is encoded once.
+_progress_body: Optional[Tuple[Tuple[str, str], bytes]] = None
+# Finished scan response, already JSON-encoded (see _encode_scan_result)
+_scan_result: Optional[List[bytes]] = None
 _scan_error: Optional[str] = None
 
+_CANCELLED_BODY = json.dumps(
+    {"status": "cancelled", "phase": "cancelled", "detail": "Scan cancelled"}
+).encode("utf-8")
+
+# "scanning" progress response, as json.dumps would write it; values are
+# filled in already escaped
+_PROGRESS_JSON = '{"status": "scanning", "phase": %s, "detail": %s}'
+
+# Results are encoded per chunk of this many rows
+_RESULT_CHUNK_ROWS = 2000
+
+# One result row, as json.dumps(separators=(",", ":")) would write its dict;
+# string fields are filled in already escaped
+_ROW_JSON = (
+    '{"file_path":%s,"line_number":%d,"table_name":%s,"column_name":%s,'
+    '"reference_type":%s,"code_snippet":%s,"confidence":%s,'
+    '"schema_verified":%s,"column_datatype":%s}'
+)
+_REF_TYPE_JSON = {t: _encode_str(t.value) for t in ReferenceType}
+_CONFIDENCE_JSON = {c: _encode_str(c.name) for c in Confidence}
+
 
 def _set_progress(phase: str, detail: str = ""):
     global _scan_progress
-    _scan_progress = {"phase": phase, "detail": detail}
+    _scan_progress = (phase, detail)
+
+
+# Directory listings are reused for this many seconds: the path picker asks
+# for the same directories again and again while the user types
+_BROWSE_TTL = 2
+
+
+@lru_cache(maxsize=128)
+def _list_dirs(target: str, bucket: int) -> Tuple[int, Dict[str, Any]]:
+    """Return (status code, payload) listing target's visible subdirectories.
+
+    bucket is the current _BROWSE_TTL time slot; it is only part of the cache
+    key, so a listing expires when the slot moves on. Raises PermissionError.
+    """
+    target_path = Path(target)
+    if not target_path.is_dir():
+        return 400, {"status": "error", "message": f"Not a directory: {target}"}
+
+    # scandir gets each entry's type from the directory read itself, so only
+    # symlinks need a stat to tell whether they point at a directory
+    with os.scandir(target_path) as it:
+        names = sorted(
+            entry.name for entry in it
+            if not entry.name.startswith(".") and entry.is_dir()
+        )
+    return 200, {
+        "status": "ok",
+        "current": str(target_path.resolve()),
+        "parent": str(target_path.parent.resolve()),
+        "entries": [
+            {"name": name, "path": str(target_path / name), "is_dir": True}
+            for name in names
+        ],
+    }
+
+
+def _encode_scan_result(results: List[ScanResult], stats: Dict[str, Any]) -> List[bytes]:
+    """Encode the finished-scan response as a list of byte chunks.
+
+    Rows are formatted straight from the result fields into _ROW_JSON, with no
+    per-row dict. Paths, table/column names and datatypes repeat across many
+    rows, so each distinct string is JSON-escaped only once. Chunks are
+    written out as-is without joining them first.
+    """
+    memo: Dict[str, str] = {}
+
+    def enc(s: str) -> str:
+        v = memo.get(s)
+        if v is None:
+            v = memo[s] = _encode_str(s)
+        return v
+
+    chunks = [b'{"status":"ok","results":[']
+    for start in range(0, len(results), _RESULT_CHUNK_ROWS):
+        rows = ",".join([
+            _ROW_JSON % (
+                enc(r.file_path), r.line_number, enc(r.table_name), enc(r.column_name),
+                _REF_TYPE_JSON[r.reference_type], _encode_str(r.code_snippet),
+                _CONFIDENCE_JSON[r.confidence],
+                "true" if r.schema_verified else "false", enc(r.column_datatype),
+            )
+            for r in results[start:start + _RESULT_CHUNK_ROWS]
+        ])
+        if start:
+            chunks.append(b",")
+        chunks.append(rows.encode("utf-8"))
+    tail = json.dumps({"stats": stats, "message": f"Found {len(results)} results"}, separators=(",", ":"))
+    chunks.append(b"]," + tail[1:].encode("utf-8"))
+    return chunks
 
 
 def _run_scan_async(params: Dict[str, Any]):
@@ -76,6 +175,7 @@ def _run_scan_async(params: Dict[str, Any]):
             repo_path, table_name, min_confidence,
             fk_column=fk_column, strict_mode=strict_mode,
             progress_cb=progress_cb, cancel_check=cancel_check,
+            use_cache=cloned_path is None,
         )
 
         if _scan_cancelled.is_set():
@@ -88,28 +188,10 @@ def _run_scan_async(params: Dict[str, Any]):
             with open(output_path, "w", newline="") as f:
                 write_csv(results, f)
 
-        results_json = [
-            {
-                "file_path": r.file_path,
-                "line_number": r.line_number,
-                "table_name": r.table_name,
-                "column_name": r.column_name,
-                "reference_type": r.reference_type.value,
-                "code_snippet": r.code_snippet,
-                "confidence": r.confidence.value,
-                "schema_verified": r.schema_verified,
-                "column_datatype": r.column_datatype,
-            }
-            for r in results
-        ]
-
-        _scan_result = {
-            "status": "ok",
-            "results": results_json,
-            "stats": stats,
-            "message": f"Found {len(results_json)} results",
-        }
-        _set_progress("done", f"{len(results_json)} results found")
+        # Encoded here, on the scan thread, so the progress request that picks
+        # it up only has to write bytes
+        _scan_result = _encode_scan_result(results, stats)
+        _set_progress("done", f"{len(results)} results found")
 
     except Exception as e:
         if not _scan_cancelled.is_set():
@@ -120,6 +202,16 @@ def _run_scan_async(params: Dict[str, Any]):
             cleanup(cloned_path)
 
 
+@lru_cache(maxsize=8)
+def _read_static(path: str, mtime_ns: int, size: int) -> bytes:
+    """Return a static file's contents.
+
+    mtime_ns and size are only part of the cache key, so an edited file is
+    read again while repeat requests cost one stat. Raises FileNotFoundError.
+    """
+    return Path(path).read_bytes()
+
+
 class ScanHandler(SimpleHTTPRequestHandler):
     """Handle API routes and serve static files."""
 
@@ -143,7 +235,8 @@ class ScanHandler(SimpleHTTPRequestHandler):
 
     def _serve_file(self, filepath: Path, content_type: str):
         try:
-            data = filepath.read_bytes()
+            st = filepath.stat()
+            data = _read_static(str(filepath), st.st_mtime_ns, st.st_size)
             self.send_response(200)
             self.send_header("Content-Type", content_type)
             self.send_header("Content-Length", str(len(data)))
@@ -153,12 +246,16 @@ class ScanHandler(SimpleHTTPRequestHandler):
             self._send_json(404, {"status": "error", "message": "File not found"})
 
     def _send_json(self, code: int, data: Dict[str, Any]):
-        body = json.dumps(data).encode("utf-8")
+        self._send_json_chunks(code, [json.dumps(data).encode("utf-8")])
+
+    def _send_json_chunks(self, code: int, chunks: List[bytes]):
+        """Send an already-encoded JSON body given as consecutive byte chunks."""
         self.send_response(code)
         self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Length", str(sum(len(c) for c in chunks)))
         self.end_headers()
-        self.wfile.write(body)
+        for chunk in chunks:
+            self.wfile.write(chunk)
 
     def _handle_browse(self):
         """List directories for the path picker."""
@@ -168,26 +265,12 @@ class ScanHandler(SimpleHTTPRequestHandler):
         params = parse_qs(parsed.query)
         target = params.get("path", [""])[0] or os.path.expanduser("~")
 
-        target_path = Path(target)
-        if not target_path.is_dir():
-            self._send_json(400, {"status": "error", "message": f"Not a directory: {target}"})
-            return
-
         try:
-            entries = []
-            for entry in sorted(target_path.iterdir()):
-                if entry.name.startswith("."):
-                    continue
-                if entry.is_dir():
-                    entries.append({"name": entry.name, "path": str(entry), "is_dir": True})
-            self._send_json(200, {
-                "status": "ok",
-                "current": str(target_path.resolve()),
-                "parent": str(target_path.parent.resolve()),
-                "entries": entries,
-            })
+            code, payload = _list_dirs(target, int(time.monotonic() // _BROWSE_TTL))
         except PermissionError:
             self._send_json(403, {"status": "error", "message": "Permission denied"})
+            return
+        self._send_json(code, payload)
 
     def _handle_scan(self):
         """Start an async scan."""
@@ -235,33 +318,41 @@ class ScanHandler(SimpleHTTPRequestHandler):
 
     def _handle_progress(self):
         """Return current scan progress or final results."""
-        global _scan_result, _scan_error, _scan_thread
-
-        phase = _scan_progress.get("phase", "idle")
+        global _scan_result, _scan_error, _scan_thread, _progress_body
 
         if _scan_cancelled.is_set():
-            self._send_json(200, {"status": "cancelled", "phase": "cancelled", "detail": "Scan cancelled"})
+            self._send_json_chunks(200, [_CANCELLED_BODY])
             return
 
-        if phase == "done" and _scan_result:
-            result = _scan_result
-            _scan_result = None
-            _set_progress("idle")
-            self._send_json(200, result)
+        # Requests are handled concurrently: hand a finished result or error to
+        # exactly one poller
+        with _scan_lock:
+            progress = _scan_progress
+            phase, detail = progress
+            response = encoded = None
+            if phase == "done" and _scan_result:
+                encoded = _scan_result
+                _scan_result = None
+                _set_progress("idle")
+            elif phase == "error" and _scan_error:
+                response = {"status": "error", "message": _scan_error}
+                _scan_error = None
+                _set_progress("idle")
+
+        if encoded is not None:
+            self._send_json_chunks(200, encoded)
             return
-
-        if phase == "error" and _scan_error:
-            err = _scan_error
-            _scan_error = None
-            _set_progress("idle")
-            self._send_json(200, {"status": "error", "message": err})
+        if response is not None:
+            self._send_json(200, response)
             return
 
-        self._send_json(200, {
-            "status": "scanning",
-            "phase": _scan_progress.get("phase", "idle"),
-            "detail": _scan_progress.get("detail", ""),
-        })
+        # _set_progress always installs a new tuple, so identity tells whether
+        # the cached body is current
+        cached = _progress_body
+        if cached is None or cached[0] is not progress:
+            body = (_PROGRESS_JSON % (_encode_str(phase), _encode_str(detail))).encode("ascii")
+            cached = _progress_body = (progress, body)
+        self._send_json_chunks(200, [cached[1]])
 
     def _handle_cancel(self):
         """Cancel the running scan."""
@@ -275,8 +366,9 @@ class ScanHandler(SimpleHTTPRequestHandler):
 
 
 def main():
-    server = HTTPServer(("localhost", PORT), ScanHandler)
-    server.daemon_threads = True
+    # One thread per request, so progress polls and cancels are answered
+    # while another request is still serializing a large result
+    server = ThreadingHTTPServer(("localhost", PORT), ScanHandler)
     url = f"http://localhost:{PORT}"
     print(f"Table Dependency Scanner running at {url}")
     threading.Timer(0.5, lambda: webbrowser.open(url)).start()
@@ -0,0 +1 @@
+ActiveRecord::Schema[7.1].define(version: 2024_01_01_000000) do  create_table "users", force: :cascade do |t|    t.string "email"    t.references :account, polymorphic: true  end  create_table "posts", force: :cascade do |t|    t.bigint "user_id"    t.references:order    t.integer "score"  create_table "comments", force: :cascade do |t|    t.text "body"    t.references :post    t.string :labelcreate_table "tags"  endend
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""Regression checks for runner._parse_schema line handling."""
+
+import os
+import re
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from table_scanner.models import FileCategory  # noqa: E402
+from table_scanner.runner import _parse_schema  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# schema_line_breaks.rb as str.splitlines() parses it line by line
+EXPECTED_COLUMNS = {
+    "users": {"email": "string", "account_id": "bigint", "account_type": "string"},
+    "posts": {"user_id": "bigint", "score": "integer"},
+    "comments": {"body": "text", "post_id": "bigint"},
+    "tags": {},
+}
+
+
+def _parse(path: str):
+    return _parse_schema({FileCategory.SCHEMA: [path]})
+
+
+class ParseSchemaLineBreaksTest(unittest.TestCase):
+    def test_splitlines_breaks_end_lines(self):
+        # CR-only endings, form feeds and a vertical tab: each ends a line, so
+        # "t.references\r:order" is no column and "comments" doesn't take over
+        # the "score" line before it. A create_table glued onto a column name
+        # still wins its line.
+        known, columns = _parse(str(FIXTURES / "schema_line_breaks.rb"))
+        self.assertEqual(known, frozenset(EXPECTED_COLUMNS))
+        self.assertEqual(columns, EXPECTED_COLUMNS)
+
+    def test_bytes_path_matches(self):
+        # The same schema with "\n" breaks only takes the bytes path
+        text = (FIXTURES / "schema_line_breaks.rb").read_bytes().decode("ascii")
+        lines = re.split(r"\r\n|[\r\n\x0b\x0c]", text)
+        fd, path = tempfile.mkstemp(suffix=".rb")
+        try:
+            with os.fdopen(fd, "w", newline="") as f:
+                f.write("\n".join(lines))
+            known, columns = _parse(path)
+        finally:
+            os.unlink(path)
+        self.assertEqual(known, frozenset(EXPECTED_COLUMNS))
+        self.assertEqual(columns, EXPECTED_COLUMNS)
+
+
+if __name__ == "__main__":
+    unittest.main()